@@ -1,67 +1,336 @@
 
 import requests
 import logging
-from typing import Dict, List, Optional, Tuple
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import Executor, Future, as_completed
 from datetime import datetime
+from fnmatch import fnmatchcase
+import functools
+import inspect
+from collections import defaultdict, namedtuple
+from dataclasses import dataclass
+import threading
 import time
+from cachetools import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Seconds a cached GET response stays fresh, by endpoint pattern (first match wins)
+CACHE_POLICY = (
+    # Search results carry availability (mediaInfo.status), so they can't be kept long
+    ('/search', 30),
+    ('/movie/*', 86400),
+    ('/tv/*', 86400),
+    ('/media/*/status', 10),
+    ('/request/*', 5),
+    ('/request', 5),
+)
+
+# Cached GET response plus the validators needed to revalidate it
+CacheEntry = namedtuple('CacheEntry', ['fresh_until', 'data', 'etag', 'last_modified'])
+
+@dataclass(slots=True)
+class ParsedMedia:
+    """Media fields pulled out of an Overseerr search result"""
+    id: int
+    title: Optional[str]
+    year: Optional[int]
+    overview: str
+    poster_path: Optional[str]
+    media_type: str
+    tmdb_id: int
+    seasons: int = 0
+    episodes: int = 0
+    available: bool = False
+
+# Overseerr request status codes -> display text
+STATUS_TEXT = {
+    1: "Pending Approval",
+    2: "Approved",
+    3: "Declined",
+    4: "Processing",
+    5: "Available"
+}
+
+def _json(response: requests.Response):
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
+
+class ApiMetrics:
+    """Per-method call counts, failures and cumulative latency for OverseerrAPI"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'calls': 0, 'errors': 0, 'seconds': 0.0})
+    
+    def observe(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            stats = self._stats[name]
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            if not ok:
+                stats['errors'] += 1
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copy of the current stats, keyed by method name"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+_metrics = ApiMetrics()
+
+def safe_api(default=None, log_fmt: str = None):
+    """Log and swallow exceptions from an API method, returning default instead.
+    
+    log_fmt is formatted with the method's arguments by name; a callable default
+    (e.g. list) is called to build a fresh value on each failure.
+    """
+    def deco(fn):
+        signature = inspect.signature(fn)
+        
+        @functools.wraps(fn)
+        def wrap(self, *args, **kwargs):
+            start = time.monotonic()
+            ok = False
+            try:
+                result = fn(self, *args, **kwargs)
+                ok = True
+                return result
+            except Exception as e:
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                message = log_fmt.format(**bound.arguments) if log_fmt else f"{fn.__name__} failed"
+                logger.error(f"{message}: {e}")
+                return default() if callable(default) else default
+            finally:
+                _metrics.observe(fn.__name__, time.monotonic() - start, ok)
+        return wrap
+    return deco
+
+class RateLimitError(requests.exceptions.RequestException):
+    """Overseerr is still rejecting requests with 429 after retries"""
+    code = 'rate_limited'
+    
+    def __init__(self, *args, retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Thread-safe token bucket that slows its refill rate after 429s (AIMD)"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+    
+    def back_off(self, retry_after: Optional[float] = None):
+        """Halve the refill rate and hold further requests for Retry-After seconds"""
+        with self.lock:
+            self._refill()
+            self.rate = max(self.base_rate / 16, self.rate / 2)
+            self.tokens = -(retry_after or 0) * self.rate
+    
+    def recover(self):
+        """Step the refill rate back up towards its base after a success"""
+        with self.lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
 class OverseerrAPI:
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, rate_limit: float = 10, burst: int = 20,
+                 pool_size: int = 20, timeout: float = 10):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate=rate_limit, capacity=burst)
         self.session = requests.Session()
         self.session.headers.update({
             'X-Api-Key': api_key,
             'Content-Type': 'application/json'
         })
+        
+        # Retry transient failures with backoff, honoring Retry-After on 429/503.
+        # Only idempotent methods are retried so a request is never submitted twice.
+        retry = Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        
+        # Keep-alive connections shared by the poller and message handler threads,
+        # so most calls reuse a warm connection instead of a fresh TCP/TLS handshake
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Prepared template for bodyless GETs; copying it skips Session.prepare_request's
+        # header/cookie/auth merging on the status-polling hot path
+        self._get_template = self.session.prepare_request(requests.Request('GET', f"{self.base_url}/api/v1/status"))
+        self._send_settings = self.session.merge_environment_settings(self._get_template.url, {}, None, None, None)
+        self._send_settings['timeout'] = timeout
+        
+        # (endpoint, params) -> CacheEntry; stale entries are kept for revalidation and fallback
+        self._cache = LRUCache(maxsize=1024)
+        self._cache_lock = threading.Lock()
+        
+        # (endpoint, params) -> Future for GETs currently in flight, shared by concurrent callers
+        self._inflight = {}
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Make HTTP request to Overseerr API"""
         url = f"{self.base_url}/api/v1{endpoint}"
         
+        # Shape outbound traffic so bursts don't trip Overseerr's rate limiter
+        self._bucket.acquire()
+        
+        # Cached lookups always pass params; an empty set still qualifies for the prepared GET
+        if not kwargs.get('params'):
+            kwargs.pop('params', None)
+        
         try:
-            response = self.session.request(method, url, **kwargs)
+            if method == 'GET' and not kwargs.keys() - {'headers'}:
+                response = self._send_get(url, kwargs.get('headers'))
+            else:
+                response = self.session.request(method, url, timeout=kwargs.pop('timeout', self.timeout), **kwargs)
+            
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+                self._bucket.back_off(retry_after)
+                raise RateLimitError("Rate limited by Overseerr", retry_after=retry_after, response=response)
+            
             response.raise_for_status()
+            self._bucket.recover()
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Overseerr API request failed: {method} {url} - {e}")
             raise
     
+    def _send_get(self, url: str, headers: Dict = None) -> requests.Response:
+        """Send a parameterless GET built from the prepared template"""
+        prepared = self._get_template.copy()
+        prepared.url = url
+        if headers:
+            prepared.headers.update(headers)
+        return self.session.send(prepared, **self._send_settings)
+    
+    def _get_json(self, endpoint: str, params: Dict = None):
+        """GET an endpoint through the response cache, serving stale data if Overseerr fails"""
+        ttl = next((ttl for pattern, ttl in CACHE_POLICY if fnmatchcase(endpoint, pattern)), None)
+        if ttl is None:
+            return _json(self._make_request('GET', endpoint, params=params))
+        
+        key = (endpoint, frozenset((params or {}).items()))
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        
+        if entry and entry.fresh_until > time.monotonic():
+            return entry.data
+        
+        # Single-flight: concurrent callers for the same key share one request
+        with self._cache_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        
+        if not leader:
+            return future.result()
+        
+        try:
+            data = self._fetch_json(key, endpoint, params, ttl, entry)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+    
+    def _fetch_json(self, key: Tuple, endpoint: str, params: Optional[Dict], ttl: int, entry: Optional[CacheEntry]):
+        """Fetch (or revalidate) a cached GET and store the result"""
+        # Revalidate a stale entry with a conditional GET instead of refetching the body
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        
+        try:
+            response = self._make_request('GET', endpoint, params=params, headers=headers)
+        except requests.exceptions.RequestException:
+            if entry:
+                logger.warning(f"Serving stale Overseerr response for {endpoint}")
+                return entry.data
+            raise
+        
+        if response.status_code == 304 and entry:
+            # Not modified: keep the body and validators, just extend freshness
+            new_entry = entry._replace(fresh_until=time.monotonic() + ttl)
+        else:
+            new_entry = CacheEntry(
+                time.monotonic() + ttl,
+                _json(response),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+        
+        with self._cache_lock:
+            self._cache[key] = new_entry
+        return new_entry.data
+    
+    def invalidate(self, pattern: str):
+        """Drop cached responses whose endpoint matches the pattern"""
+        with self._cache_lock:
+            for key in [key for key in self._cache if fnmatchcase(key[0], pattern)]:
+                del self._cache[key]
+    
+    @safe_api(default=False, log_fmt="Overseerr connection test failed")
     def test_connection(self) -> bool:
         """Test connection to Overseerr"""
-        try:
-            response = self._make_request('GET', '/status')
-            return response.status_code == 200
-        except Exception as e:
-            logger.error(f"Overseerr connection test failed: {e}")
-            return False
+        response = self._make_request('GET', '/status')
+        return response.status_code == 200
     
+    @safe_api(default=list, log_fmt="Media search failed for '{query}'")
     def search_media(self, query: str, media_type: str = None) -> List[Dict]:
         """Search for media in Overseerr"""
-        try:
-            params = {'query': query}
-            if media_type:
-                params['type'] = media_type
-            
-            response = self._make_request('GET', '/search', params=params)
-            data = response.json()
-            
-            return data.get('results', [])
-        except Exception as e:
-            logger.error(f"Media search failed for '{query}': {e}")
-            return []
+        # Normalize case and whitespace so "The Matrix" and " the  matrix" share a cache entry
+        params = {'query': ' '.join(query.split()).lower()}
+        if media_type:
+            params['type'] = media_type
+        
+        data = self._get_json('/search', params=params)
+        
+        return data.get('results', [])
     
+    @safe_api(log_fmt="Failed to get {media_type} details for ID {media_id}")
     def get_media_details(self, media_type: str, media_id: int) -> Optional[Dict]:
         """Get detailed media information"""
-        try:
-            endpoint = f"/{media_type}/{media_id}"
-            response = self._make_request('GET', endpoint)
-            return response.json()
-        except Exception as e:
-            logger.error(f"Failed to get {media_type} details for ID {media_id}: {e}")
-            return None
+        return self._get_json(f"/{media_type}/{media_id}")
     
     def request_movie(self, movie_id: int, is_4k: bool = False) -> Tuple[bool, Optional[int], Optional[str]]:
         """Request a movie"""
@@ -73,9 +342,12 @@ class OverseerrAPI:
             }
             
             response = self._make_request('POST', '/request', json=payload)
-            data = response.json()
+            data = _json(response)
             
             request_id = data.get('id')
+            self.invalidate('/request*')
+            self.invalidate('/media/*')
+            self.invalidate('/search')
             logger.info(f"Movie request created: ID {request_id} for movie {movie_id}")
             return True, request_id, None
             
@@ -105,9 +377,12 @@ class OverseerrAPI:
                 payload['seasons'] = seasons
             
             response = self._make_request('POST', '/request', json=payload)
-            data = response.json()
+            data = _json(response)
             
             request_id = data.get('id')
+            self.invalidate('/request*')
+            self.invalidate('/media/*')
+            self.invalidate('/search')
             logger.info(f"TV show request created: ID {request_id} for show {tv_id}")
             return True, request_id, None
             
@@ -124,124 +399,142 @@ class OverseerrAPI:
             logger.error(error_msg)
             return False, None, error_msg
     
+    @safe_api(log_fmt="Failed to get request status for ID {request_id}")
     def get_request_status(self, request_id: int) -> Optional[Dict]:
         """Get status of a specific request"""
-        try:
-            response = self._make_request('GET', f'/request/{request_id}')
-            return response.json()
-        except Exception as e:
-            logger.error(f"Failed to get request status for ID {request_id}: {e}")
-            return None
+        return self._get_json(f'/request/{request_id}')
     
+    def get_request_statuses(self, request_ids: Iterable[int], executor: Executor) -> Dict[int, Dict]:
+        """Get status of several requests concurrently on the given executor"""
+        futures = {
+            executor.submit(self.get_request_status, request_id): request_id
+            for request_id in set(request_ids)
+        }
+        
+        statuses = {}
+        for future in as_completed(futures):
+            # One failed lookup must not sink the rest of the batch
+            if future.exception():
+                logger.error(f"Status lookup failed for request {futures[future]}: {future.exception()}")
+                continue
+            result = future.result()
+            if result:
+                statuses[futures[future]] = result
+        
+        return statuses
+    
+    @safe_api(default=list, log_fmt="Failed to get requests")
     def get_all_requests(self, take: int = 20, skip: int = 0, filter_status: str = None) -> List[Dict]:
         """Get all requests with pagination"""
+        params = {'take': take, 'skip': skip}
+        if filter_status:
+            params['filter'] = filter_status
+        
+        data = self._get_json('/request', params=params)
+        
+        return data.get('results', [])
+    
+    def get_requests_bulk(self, ids: Set[int], page_size: int = 100, max_pages: int = 5) -> Dict[int, Dict]:
+        """Get many requests in as few calls as possible, indexed by request ID.
+        
+        IDs not found within max_pages pages are left for the per-request fallback.
+        """
+        found = {}
+        remaining = set(ids)
+        skip = 0
+        
         try:
-            params = {'take': take, 'skip': skip}
-            if filter_status:
-                params['filter'] = filter_status
-            
-            response = self._make_request('GET', '/request', params=params)
-            data = response.json()
-            
-            return data.get('results', [])
+            # Page through /request (newest first) until every ID is found
+            for _ in range(max_pages):
+                if not remaining:
+                    break
+                
+                params = {'take': page_size, 'skip': skip}
+                response = self._make_request('GET', '/request', params=params)
+                results = _json(response).get('results', [])
+                
+                for result in results:
+                    request_id = result.get('id')
+                    if request_id in remaining:
+                        found[request_id] = result
+                        remaining.discard(request_id)
+                
+                # IDs only grow, so once a page reaches below the oldest tracked ID the
+                # rest were deleted in Overseerr and no later page can contain them
+                if len(results) < page_size or not remaining:
+                    break
+                if min(result.get('id', 0) for result in results) < min(remaining):
+                    break
+                skip += page_size
         except Exception as e:
-            logger.error(f"Failed to get requests: {e}")
-            return []
+            logger.error(f"Bulk request fetch failed: {e}")
+        
+        return found
     
+    @safe_api(log_fmt="Failed to get media status for ID {media_id}")
     def get_media_status(self, media_id: int) -> Optional[Dict]:
         """Get media availability status"""
-        try:
-            response = self._make_request('GET', f'/media/{media_id}/status')
-            return response.json()
-        except Exception as e:
-            logger.error(f"Failed to get media status for ID {media_id}: {e}")
-            return None
+        return self._get_json(f'/media/{media_id}/status')
     
+    @safe_api(default=False, log_fmt="Failed to approve request {request_id}")
     def approve_request(self, request_id: int) -> bool:
         """Approve a request (admin only)"""
-        try:
-            response = self._make_request('POST', f'/request/{request_id}/approve')
-            logger.info(f"Request {request_id} approved")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to approve request {request_id}: {e}")
-            return False
+        self._make_request('POST', f'/request/{request_id}/approve')
+        self.invalidate('/request*')
+        logger.info(f"Request {request_id} approved")
+        return True
     
+    @safe_api(default=False, log_fmt="Failed to decline request {request_id}")
     def decline_request(self, request_id: int, reason: str = None) -> bool:
         """Decline a request (admin only)"""
-        try:
-            payload = {}
-            if reason:
-                payload['reason'] = reason
-            
-            response = self._make_request('POST', f'/request/{request_id}/decline', json=payload)
-            logger.info(f"Request {request_id} declined")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to decline request {request_id}: {e}")
-            return False
+        payload = {}
+        if reason:
+            payload['reason'] = reason
+        
+        self._make_request('POST', f'/request/{request_id}/decline', json=payload)
+        self.invalidate('/request*')
+        logger.info(f"Request {request_id} declined")
+        return True
     
+    @safe_api(default=list, log_fmt="Failed to get user requests for user {user_id}")
     def get_user_requests(self, user_id: int) -> List[Dict]:
         """Get requests for a specific user"""
-        try:
-            params = {'requestedBy': user_id}
-            response = self._make_request('GET', '/request', params=params)
-            data = response.json()
-            
-            return data.get('results', [])
-        except Exception as e:
-            logger.error(f"Failed to get user requests for user {user_id}: {e}")
-            return []
+        params = {'requestedBy': user_id}
+        data = self._get_json('/request', params=params)
+        
+        return data.get('results', [])
+    
+    def get_metrics(self) -> Dict[str, Dict]:
+        """Call counts, error counts and total seconds per API method"""
+        return _metrics.snapshot()
     
-    def parse_media_info(self, media_data: Dict) -> Dict:
+    def parse_media_info(self, media_data: Dict) -> ParsedMedia:
         """Parse media information from search results"""
         media_type = media_data.get('mediaType', 'movie')
         
-        parsed = {
-            'id': media_data.get('id'),
-            'title': media_data.get('title') or media_data.get('name'),
-            'year': None,
-            'overview': media_data.get('overview', ''),
-            'poster_path': media_data.get('posterPath'),
-            'media_type': media_type,
-            'tmdb_id': media_data.get('id')
-        }
+        # Year is the leading YYYY of the release (movie) or first air (TV) date
+        date = media_data.get('releaseDate' if media_type == 'movie' else 'firstAirDate') or ''
+        year = date[:4]
         
-        # Extract year from release date
-        if media_type == 'movie':
-            release_date = media_data.get('releaseDate')
-            if release_date:
-                parsed['year'] = int(release_date.split('-')[0])
-        else:  # TV show
-            first_air_date = media_data.get('firstAirDate')
-            if first_air_date:
-                parsed['year'] = int(first_air_date.split('-')[0])
+        parsed = ParsedMedia(
+            id=media_data.get('id'),
+            title=media_data.get('title') or media_data.get('name'),
+            year=int(year) if len(year) == 4 and year.isdigit() else None,
+            overview=media_data.get('overview', ''),
+            poster_path=media_data.get('posterPath'),
+            media_type=media_type,
+            tmdb_id=media_data.get('id'),
+            # Search results carry Overseerr's media status, so no separate lookup is needed
+            available=(media_data.get('mediaInfo') or {}).get('status') == 5
+        )
         
         # TV show specific info
         if media_type == 'tv':
-            parsed['seasons'] = media_data.get('numberOfSeasons', 0)
-            parsed['episodes'] = media_data.get('numberOfEpisodes', 0)
+            parsed.seasons = media_data.get('numberOfSeasons', 0)
+            parsed.episodes = media_data.get('numberOfEpisodes', 0)
         
         return parsed
     
     def get_request_status_text(self, status_code: int) -> str:
         """Convert Overseerr status code to readable text"""
-        status_map = {
-            1: "Pending Approval",
-            2: "Approved",
-            3: "Declined",
-            4: "Processing",
-            5: "Available"
-        }
-        return status_map.get(status_code, f"Unknown ({status_code})")
-    
-    def is_media_available(self, media_id: int) -> bool:
-        """Check if media is already available"""
-        try:
-            status = self.get_media_status(media_id)
-            if status:
-                return status.get('status') == 5  # Available
-            return False
-        except Exception as e:
-            logger.error(f"Failed to check media availability for {media_id}: {e}")
-            return False
+        return STATUS_TEXT.get(status_code, f"Unknown ({status_code})")
@@ -1,11 +1,14 @@
 
+import heapq
 import logging
+import queue
+import signal
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.triggers.date import DateTrigger
 
 from config import Config
 from db.models import db, VerbosityLevel, RequestStatus
@@ -13,17 +16,106 @@ from db.crud import UserCRUD, MediaRequestCRUD, SettingsCRUD, LogCRUD
 from api.overseerr import OverseerrAPI
 from bot.signal_client import SignalClient, SignalMessage
 from bot.message_handler import MessageHandler
+from bot.webhook import WebhookServer
+from bot.log_buffer import LogBuffer
 
 logger = logging.getLogger(__name__)
 
+# Overseerr request status codes -> our status values
+_STATUS_MAP = {
+    1: 'pending',      # Pending approval
+    2: 'approved',     # Approved
+    3: 'declined',     # Declined
+    4: 'downloading',  # Processing
+    5: 'completed'     # Available
+}
+
+# Overseerr webhook notification types -> our status values
+_NOTIFICATION_STATUS_MAP = {
+    'MEDIA_PENDING': 'pending',
+    'MEDIA_APPROVED': 'approved',
+    'MEDIA_AUTO_APPROVED': 'approved',
+    'MEDIA_AVAILABLE': 'completed',
+    'MEDIA_DECLINED': 'declined',
+    'MEDIA_FAILED': 'failed'
+}
+
+# Status update templates for the short verbosity levels
+_TEMPLATES = {
+    VerbosityLevel.CASUAL.value: {
+        'downloading': "📥 '{title}' is downloadin' now!",
+        'completed': "🎉 '{title}' is done downloadin'! Enjoy!",
+        'declined': "😞 '{title}' got declined, sorry!",
+        'failed': "💥 '{title}' failed to download.",
+    },
+    VerbosityLevel.SIMPLE.value: {
+        'downloading': "⬇️ {title} - Download started",
+        'completed': "✅ {title} - Download completed!",
+        'declined': "❌ {title} - Request declined",
+        'failed': "❌ {title} - Download failed",
+    },
+}
+
+# Closing line of a verbose status update
+_VERBOSE_FOOTERS = {
+    'completed': "🎉 **Ready to watch!**",
+    'downloading': "📥 **Download in progress...**",
+}
+
+def _fmt_casual(title: str, status: str) -> str:
+    template = _TEMPLATES[VerbosityLevel.CASUAL.value].get(status)
+    return template.format(title=title) if template else f"Status update: {title} - {status}"
+
+def _fmt_simple(title: str, status: str) -> str:
+    template = _TEMPLATES[VerbosityLevel.SIMPLE.value].get(status)
+    return template.format(title=title) if template else f"Status update: {title} - {status}"
+
+def _fmt_verbose(title: str, status: str) -> str:
+    return (
+        f"📊 **Status Update**\n\n"
+        f"🎬 **Title:** {title}\n"
+        f"🔄 **Status:** {status.replace('_', ' ').title()}\n"
+        f"⏰ **Updated:** {datetime.utcnow().strftime('%H:%M')}\n"
+        f"{_VERBOSE_FOOTERS.get(status, '')}"
+    )
+
+# Status update formatter for each verbosity level
+_FORMATTERS = {
+    VerbosityLevel.CASUAL.value: _fmt_casual,
+    VerbosityLevel.SIMPLE.value: _fmt_simple,
+    VerbosityLevel.VERBOSE.value: _fmt_verbose,
+}
+
 class SignalerrBot:
     def __init__(self):
         self.config = Config()
         self.signal_client = None
         self.overseerr_api = None
         self.message_handler = None
+        self.webhook_server = None
         self.scheduler = BackgroundScheduler()
         self.is_running = False
+        self._shutdown_event = threading.Event()
+        self._poll_pool = ThreadPoolExecutor(max_workers=self.config.POLL_WORKERS or 8)
+        
+        # Parsed runtime settings, refreshed by reload_settings()
+        self._admin_phones: list[str] = []
+        self._timeout_minutes: int = 2
+        self._log_retention_days: int = 30
+        
+        # Deferred single-request checks: heap of (run_at, request_id)
+        self._deferred = []
+        self._deferred_due = {}
+        self._deferred_cv = threading.Condition()
+        self._deferred_thread = None
+        
+        # Outbound status notifications, drained by notifier threads so a slow
+        # signal-cli send never holds up the next poll
+        self._notify_queue = queue.Queue(maxsize=256)
+        self._notify_threads = []
+        
+        # Activity log rows, written to the DB in batches
+        self.log_buffer = LogBuffer()
         
     def initialize(self):
         """Initialize bot components"""
@@ -31,10 +123,17 @@ class SignalerrBot:
             # Validate configuration
             self.config.validate()
             
+            # Load runtime settings once rather than on every use
+            self.reload_settings()
+            
             # Initialize Overseerr API
             self.overseerr_api = OverseerrAPI(
                 self.config.OVERSEERR_URL,
-                self.config.OVERSEERR_API_KEY
+                self.config.OVERSEERR_API_KEY,
+                rate_limit=self.config.OVERSEERR_RATE_LIMIT,
+                burst=self.config.OVERSEERR_BURST,
+                pool_size=self.config.OVERSEERR_POOL_SIZE,
+                timeout=self.config.OVERSEERR_TIMEOUT
             )
             
             # Test Overseerr connection
@@ -46,7 +145,8 @@ class SignalerrBot:
             self.signal_client = SignalClient(
                 self.config.SIGNAL_PHONE_NUMBER,
                 self.config.SIGNAL_CLI_PATH,
-                self.config.SIGNAL_CLI_CONFIG_DIR
+                self.config.SIGNAL_CLI_CONFIG_DIR,
+                max_workers=self.config.MESSAGE_WORKERS
             )
             
             # Check Signal registration
@@ -55,7 +155,7 @@ class SignalerrBot:
                 return False
             
             # Initialize message handler
-            self.message_handler = MessageHandler(self.signal_client, self.overseerr_api)
+            self.message_handler = MessageHandler(self.signal_client, self.overseerr_api, self.log_buffer)
             
             # Add message handler to signal client
             self.signal_client.add_message_handler(self.message_handler.handle_message)
@@ -72,14 +172,24 @@ class SignalerrBot:
     
     def setup_scheduler(self):
         """Setup scheduled tasks"""
-        # Check request statuses every 30 seconds
+        # Check request statuses every 30 seconds, or every 5 minutes as a
+        # safety net when Overseerr pushes updates through the webhook
+        poll_seconds = 300 if self.config.ENABLE_WEBHOOK else 30
         self.scheduler.add_job(
             func=self.check_request_statuses,
-            trigger=IntervalTrigger(seconds=30),
+            trigger=IntervalTrigger(seconds=poll_seconds),
             id='check_request_statuses',
             name='Check Request Statuses'
         )
         
+        # Write batched user activity times
+        self.scheduler.add_job(
+            func=self.message_handler.flush_last_active,
+            trigger=IntervalTrigger(seconds=10),
+            id='flush_last_active',
+            name='Flush Last Active'
+        )
+        
         # Clean up old logs daily
         self.scheduler.add_job(
             func=self.cleanup_old_logs,
@@ -88,6 +198,14 @@ class SignalerrBot:
             name='Cleanup Old Logs'
         )
         
+        # Pick up settings changed from the web interface
+        self.scheduler.add_job(
+            func=self.reload_settings,
+            trigger=IntervalTrigger(minutes=1),
+            id='reload_settings',
+            name='Reload Settings'
+        )
+        
         # Send daily stats to admins
         self.scheduler.add_job(
             func=self.send_daily_stats,
@@ -103,6 +221,9 @@ class SignalerrBot:
             return
         
         try:
+            # Start log writer before anything that logs activity
+            self.log_buffer.start()
+            
             # Start scheduler
             self.scheduler.start()
             
@@ -111,19 +232,41 @@ class SignalerrBot:
                 logger.error("Failed to start Signal client")
                 return False
             
+            # Start Overseerr webhook receiver
+            if self.config.ENABLE_WEBHOOK:
+                self.webhook_server = WebhookServer(
+                    self.handle_request_update,
+                    self.config.WEBHOOK_HOST,
+                    self.config.WEBHOOK_PORT,
+                    self.config.WEBHOOK_SECRET
+                )
+                if not self.webhook_server.start():
+                    logger.warning("Webhook server failed to start, relying on polling")
+            
             self.is_running = True
+            
+            # Start deferred status check worker
+            self._deferred_thread = threading.Thread(target=self._deferred_check_worker, daemon=True)
+            self._deferred_thread.start()
+            
+            # Start status notification workers
+            for _ in range(2):
+                thread = threading.Thread(target=self._notify_worker, daemon=True)
+                thread.start()
+                self._notify_threads.append(thread)
+            
             logger.info("Signalerr bot started successfully")
             
             # Send startup notification to admins
             self.notify_admins("🤖 Signalerr bot has started successfully!")
             
-            # Keep the main thread alive
+            # Block the main thread until stop() or a signal handler sets the event
             try:
-                while self.is_running:
-                    time.sleep(1)
+                self._shutdown_event.wait()
             except KeyboardInterrupt:
                 logger.info("Received shutdown signal")
-                self.stop()
+            
+            self.stop()
             
             return True
             
@@ -138,135 +281,192 @@ class SignalerrBot:
             return
         
         logger.info("Stopping Signalerr bot...")
+        self._shutdown_event.set()
         
         try:
             # Stop Signal client
             if self.signal_client:
                 self.signal_client.stop_listening()
             
+            # Stop webhook receiver
+            if self.webhook_server:
+                self.webhook_server.stop()
+            
             # Stop scheduler
             if self.scheduler.running:
                 self.scheduler.shutdown(wait=False)
             
+            self._poll_pool.shutdown(wait=False)
+            
             self.is_running = False
             
+            # Wake the deferred check worker so it can exit
+            with self._deferred_cv:
+                self._deferred_cv.notify_all()
+            
+            # Let the notifier threads finish what is already queued
+            for _ in self._notify_threads:
+                self._notify_queue.put(None)
+            for thread in self._notify_threads:
+                thread.join(timeout=10)
+            self._notify_threads = []
+            
             # Send shutdown notification to admins
             self.notify_admins("🤖 Signalerr bot has been stopped.")
             
+            # Write out any queued log rows and activity times
+            self.log_buffer.stop()
+            if self.message_handler:
+                self.message_handler.flush_last_active()
+            
             logger.info("Bot stopped successfully")
             
         except Exception as e:
             logger.error(f"Error stopping bot: {e}")
     
+    def request_shutdown(self):
+        """Wake the main thread so start() returns and shuts the bot down"""
+        logger.info("Received shutdown signal")
+        self._shutdown_event.set()
+    
     def check_request_statuses(self):
         """Check status of pending requests"""
         try:
             pending_requests = MediaRequestCRUD.get_pending_requests()
+            timeout = timedelta(minutes=self._timeout_minutes)
+            now = datetime.utcnow()
             
+            to_check = []
             for request in pending_requests:
-                try:
-                    # Skip if request was just created (wait for timeout)
-                    if request.status == RequestStatus.PENDING:
-                        timeout_minutes = int(SettingsCRUD.get_setting('request_timeout_minutes', '2'))
-                        if datetime.utcnow() - request.created_at < timedelta(minutes=timeout_minutes):
-                            continue
+                # Skip if request was just created (wait for timeout)
+                if request.status == RequestStatus.PENDING.value and now - request.created_at < timeout:
+                    continue
+                
+                if request.overseerr_request_id:
+                    to_check.append(request)
+            
+            if not to_check:
+                return
+            
+            # Fetch all statuses from Overseerr in one sweep
+            statuses = self.overseerr_api.get_requests_bulk(
+                {request.overseerr_request_id for request in to_check}
+            )
+            
+            # Fall back to concurrent per-request lookups for anything the sweep missed
+            missing = {request.overseerr_request_id for request in to_check} - statuses.keys()
+            if missing:
+                statuses.update(self.overseerr_api.get_request_statuses(missing, self._poll_pool))
+            
+            changes = []
+            for request in to_check:
+                overseerr_status = statuses.get(request.overseerr_request_id)
+                
+                if overseerr_status:
+                    new_status = self.map_overseerr_status(overseerr_status.get('status', 1))
                     
-                    # Get status from Overseerr
-                    if request.overseerr_request_id:
-                        overseerr_status = self.overseerr_api.get_request_status(request.overseerr_request_id)
-                        
-                        if overseerr_status:
-                            new_status = self.map_overseerr_status(overseerr_status.get('status', 1))
-                            
-                            if new_status != request.status.value:
-                                # Update status
-                                MediaRequestCRUD.update_request_status(request.id, new_status)
-                                
-                                # Notify user if they have auto notifications enabled
-                                user = UserCRUD.get_user_by_id(request.user_id)
-                                if user and user.auto_notifications:
-                                    self.send_status_update(user, request, new_status)
+                    if new_status != request.status:
+                        changes.append((request, new_status))
+            
+            if not changes:
+                return
+            
+            # Persist every status change in one transaction
+            MediaRequestCRUD.bulk_update_status([(request.id, new_status) for request, new_status in changes])
+            
+            for request, new_status in changes:
+                try:
+                    # Notify user if they have auto notifications enabled
+                    user = UserCRUD.get_user_by_id(request.user_id)
+                    if user and user.auto_notifications:
+                        self.queue_status_update(user, request, new_status)
                     
                 except Exception as e:
-                    logger.error(f"Error checking status for request {request.id}: {e}")
+                    logger.error(f"Error queueing status update for request {request.id}: {e}")
                     continue
                     
         except Exception as e:
             logger.error(f"Error in check_request_statuses: {e}")
     
+    def handle_request_update(self, payload: dict):
+        """Apply a request status change pushed by an Overseerr webhook"""
+        notification_type = payload.get('notification_type')
+        new_status = _NOTIFICATION_STATUS_MAP.get(notification_type)
+        if not new_status:
+            logger.debug(f"Ignoring webhook notification {notification_type}")
+            return
+        
+        request_info = payload.get('request') or {}
+        overseerr_request_id = request_info.get('request_id') or request_info.get('id')
+        if not overseerr_request_id:
+            logger.warning(f"Webhook {notification_type} has no request ID")
+            return
+        
+        request = MediaRequestCRUD.get_request_by_overseerr_id(int(overseerr_request_id))
+        if not request:
+            logger.debug(f"Webhook for unknown Overseerr request {overseerr_request_id}")
+            return
+        
+        if new_status != request.status:
+            MediaRequestCRUD.update_request_status(request.id, new_status)
+            
+            # Notify user if they have auto notifications enabled; the notifier threads
+            # send it so the webhook response doesn't wait on signal-cli
+            user = UserCRUD.get_user_by_id(request.user_id)
+            if user and user.auto_notifications:
+                self.queue_status_update(user, request, new_status)
+    
     def map_overseerr_status(self, overseerr_status: int) -> str:
         """Map Overseerr status codes to our status enum"""
-        status_map = {
-            1: 'pending',      # Pending approval
-            2: 'approved',     # Approved
-            3: 'declined',     # Declined
-            4: 'downloading',  # Processing
-            5: 'completed'     # Available
-        }
-        return status_map.get(overseerr_status, 'pending')
+        return _STATUS_MAP.get(overseerr_status, 'pending')
     
     def send_status_update(self, user, request, new_status):
         """Send status update to user"""
         try:
             message = self.format_status_message(user, request, new_status)
-            self.signal_client.send_message(user.phone_number, message)
-            
-            LogCRUD.create_log(
-                level='INFO',
-                message=f"Sent status update to {user.phone_number}",
-                module='bot',
-                user_id=user.id,
-                request_id=request.id
-            )
+            self.deliver_status_update(user.phone_number, message, user.id, request.id)
             
         except Exception as e:
             logger.error(f"Failed to send status update to {user.phone_number}: {e}")
     
+    def queue_status_update(self, user, request, new_status):
+        """Queue a status update for the notifier threads (blocks while the queue is full)"""
+        message = self.format_status_message(user, request, new_status)
+        self._notify_queue.put((user.phone_number, message, user.id, request.id))
+    
+    def deliver_status_update(self, phone_number: str, message: str, user_id: int, request_id: int):
+        """Send a formatted status update and log it"""
+        self.signal_client.send_message(phone_number, message)
+        
+        self.log_buffer.add(
+            level='INFO',
+            message=f"Sent status update to {phone_number}",
+            module='bot',
+            user_id=user_id,
+            request_id=request_id
+        )
+    
+    def _notify_worker(self):
+        """Drain the notification queue until a None sentinel arrives"""
+        while True:
+            item = self._notify_queue.get()
+            if item is None:
+                return
+            
+            try:
+                self.deliver_status_update(*item)
+            except Exception as e:
+                logger.error(f"Failed to send status update to {item[0]}: {e}")
+    
     def format_status_message(self, user, request, status):
         """Format status update message based on user's verbosity level"""
-        title = request.title
-        
-        if user.verbosity_level == VerbosityLevel.CASUAL:
-            if status == 'downloading':
-                return f"📥 '{title}' is downloadin' now!"
-            elif status == 'completed':
-                return f"🎉 '{title}' is done downloadin'! Enjoy!"
-            elif status == 'declined':
-                return f"😞 '{title}' got declined, sorry!"
-            elif status == 'failed':
-                return f"💥 '{title}' failed to download."
-        
-        elif user.verbosity_level == VerbosityLevel.SIMPLE:
-            if status == 'downloading':
-                return f"⬇️ {title} - Download started"
-            elif status == 'completed':
-                return f"✅ {title} - Download completed!"
-            elif status == 'declined':
-                return f"❌ {title} - Request declined"
-            elif status == 'failed':
-                return f"❌ {title} - Download failed"
-        
-        else:  # VERBOSE
-            status_text = status.replace('_', ' ').title()
-            message = f"📊 **Status Update**\n\n"
-            message += f"🎬 **Title:** {title}\n"
-            message += f"🔄 **Status:** {status_text}\n"
-            message += f"⏰ **Updated:** {datetime.utcnow().strftime('%H:%M')}\n"
-            
-            if status == 'completed':
-                message += f"🎉 **Ready to watch!**"
-            elif status == 'downloading':
-                message += f"📥 **Download in progress...**"
-            
-            return message
-        
-        return f"Status update: {title} - {status}"
+        formatter = _FORMATTERS.get(user.verbosity_level, _fmt_verbose)
+        return formatter(request.title, status)
     
     def cleanup_old_logs(self):
         """Clean up old log entries"""
         try:
-            days_to_keep = int(SettingsCRUD.get_setting('log_retention_days', '30'))
-            deleted_count = LogCRUD.cleanup_old_logs(days_to_keep)
+            deleted_count = LogCRUD.cleanup_old_logs(self._log_retention_days)
             
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} old log entries")
@@ -278,14 +478,12 @@ class SignalerrBot:
         """Send daily statistics to admins"""
         try:
             # Get statistics
-            total_users = len(UserCRUD.get_all_users())
-            recent_requests = MediaRequestCRUD.get_recent_requests(days=1)
-            pending_requests = MediaRequestCRUD.get_requests_by_status('pending')
+            counts = MediaRequestCRUD.get_summary_counts(days=1)
             
             message = f"📊 **Daily Signalerr Stats**\n\n"
-            message += f"👥 Active Users: {total_users}\n"
-            message += f"📋 Requests Today: {len(recent_requests)}\n"
-            message += f"⏳ Pending Requests: {len(pending_requests)}\n"
+            message += f"👥 Active Users: {counts['total_users']}\n"
+            message += f"📋 Requests Today: {counts['recent_requests']}\n"
+            message += f"⏳ Pending Requests: {counts['pending_requests']}\n"
             message += f"📅 Date: {datetime.utcnow().strftime('%Y-%m-%d')}"
             
             self.notify_admins(message)
@@ -293,14 +491,27 @@ class SignalerrBot:
         except Exception as e:
             logger.error(f"Error sending daily stats: {e}")
     
+    def reload_settings(self):
+        """Re-read and parse the settings used on the bot's hot paths"""
+        try:
+            # Skip the settings cache so a SIGHUP sees edits immediately
+            SettingsCRUD.invalidate()
+            self._admin_phones = list(SettingsCRUD.get_admin_phones())
+            self._timeout_minutes = int(SettingsCRUD.get_setting('request_timeout_minutes', '2'))
+            self._log_retention_days = int(SettingsCRUD.get_setting('log_retention_days', '30'))
+            
+        except Exception as e:
+            logger.error(f"Error reloading settings: {e}")
+    
+    def get_admin_phones(self):
+        """Get admin phone numbers"""
+        return self._admin_phones
+    
     def notify_admins(self, message: str):
         """Send notification to all admin users"""
         try:
-            admin_phones = SettingsCRUD.get_setting('admin_phone_numbers', '').split(',')
-            admin_phones = [phone.strip() for phone in admin_phones if phone.strip()]
-            
-            for admin_phone in admin_phones:
-                self.signal_client.send_message(admin_phone, message)
+            # One signal-cli call for every admin
+            self.signal_client.send_message_to_recipients(self.get_admin_phones(), message)
                 
         except Exception as e:
             logger.error(f"Failed to notify admins: {e}")
@@ -308,21 +519,45 @@ class SignalerrBot:
     def schedule_request_check(self, request_id: int, delay_minutes: int = None):
         """Schedule a status check for a specific request"""
         if delay_minutes is None:
-            delay_minutes = int(SettingsCRUD.get_setting('request_timeout_minutes', '2'))
+            delay_minutes = self._timeout_minutes
         
-        run_time = datetime.utcnow() + timedelta(minutes=delay_minutes)
+        run_at = time.monotonic() + delay_minutes * 60
         
-        self.scheduler.add_job(
-            func=self.check_single_request,
-            trigger=DateTrigger(run_date=run_time),
-            args=[request_id],
-            id=f'check_request_{request_id}',
-            name=f'Check Request {request_id}',
-            replace_existing=True
-        )
+        with self._deferred_cv:
+            # A newer schedule replaces any earlier one for the same request
+            self._deferred_due[request_id] = run_at
+            heapq.heappush(self._deferred, (run_at, request_id))
+            self._deferred_cv.notify()
         
         logger.info(f"Scheduled status check for request {request_id} in {delay_minutes} minutes")
     
+    def _deferred_check_worker(self):
+        """Run scheduled single-request checks as they come due"""
+        while True:
+            with self._deferred_cv:
+                request_id = None
+                while self.is_running and request_id is None:
+                    if not self._deferred:
+                        self._deferred_cv.wait()
+                        continue
+                    
+                    run_at, candidate = self._deferred[0]
+                    delay = run_at - time.monotonic()
+                    if delay > 0:
+                        self._deferred_cv.wait(delay)
+                        continue
+                    
+                    heapq.heappop(self._deferred)
+                    # Skip entries superseded by a later reschedule
+                    if self._deferred_due.get(candidate) == run_at:
+                        del self._deferred_due[candidate]
+                        request_id = candidate
+                
+                if not self.is_running:
+                    return
+            
+            self.check_single_request(request_id)
+    
     def check_single_request(self, request_id: int):
         """Check status of a single request"""
         try:
@@ -337,7 +572,7 @@ class SignalerrBot:
                 if overseerr_status:
                     new_status = self.map_overseerr_status(overseerr_status.get('status', 1))
                     
-                    if new_status != request.status.value:
+                    if new_status != request.status:
                         MediaRequestCRUD.update_request_status(request.id, new_status)
                         
                         # Notify user
@@ -367,6 +602,12 @@ def main():
     # Create bot instance
     bot = SignalerrBot()
     
+    # supervisord stops the bot with SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.request_shutdown())
+    
+    # SIGHUP re-reads settings without a restart
+    signal.signal(signal.SIGHUP, lambda signum, frame: bot.reload_settings())
+    
     # Initialize and start
     if bot.initialize():
         bot.start()
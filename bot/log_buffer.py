@@ -0,0 +1,67 @@
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from db.crud import LogCRUD
+
+logger = logging.getLogger(__name__)
+
+class LogBuffer:
+    """Queues log rows in memory and writes them to the DB in batches from a background thread"""
+    
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows = deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self.thread = None
+    
+    def add(self, level, message, module=None, user_id=None, request_id=None):
+        """Queue a log entry (same arguments as LogCRUD.create_log, without metadata)"""
+        self._rows.append({
+            'level': level.upper(),
+            'message': message,
+            'module': module,
+            'user_id': user_id,
+            'request_id': request_id,
+            'created_at': datetime.utcnow()
+        })
+        
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+    
+    def flush(self):
+        """Write everything queued so far"""
+        while self._rows:
+            batch = []
+            while self._rows and len(batch) < self.batch_size:
+                batch.append(self._rows.popleft())
+            
+            try:
+                LogCRUD.bulk_create_logs(batch)
+            except Exception as e:
+                logger.error(f"Dropped {len(batch)} log entries: {e}")
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def start(self):
+        """Start the background flusher"""
+        self._stopping.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        
+        self.flush()
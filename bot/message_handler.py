@@ -1,19 +1,79 @@
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
 from datetime import datetime
 from db.crud import UserCRUD, MediaRequestCRUD, SettingsCRUD, LogCRUD
 from db.models import VerbosityLevel, RequestStatus
-from api.overseerr import OverseerrAPI
+from api.overseerr import OverseerrAPI, ParsedMedia
 from bot.signal_client import SignalMessage, SignalClient
+from bot.log_buffer import LogBuffer
 
 logger = logging.getLogger(__name__)
 
+# "season 3", "seasons 1-4", "season 2 – 5"
+_SEASON_RE = re.compile(r'season[s]?\s*(\d+)(?:\s*[-–]\s*(\d+))?')
+
+# Words that ask for the most recent seasons of a show
+_LATEST_WORDS = frozenset(('latest', 'recent', 'new', 'current'))
+
+_STATUS_EMOJI = {
+    RequestStatus.PENDING.value: "⏳",
+    RequestStatus.APPROVED.value: "✅",
+    RequestStatus.DOWNLOADING.value: "⬇️",
+    RequestStatus.COMPLETED.value: "🎉",
+    RequestStatus.FAILED.value: "❌",
+    RequestStatus.DECLINED.value: "❌"
+}
+
+# Request confirmations keyed by (verbosity, media type, specific seasons requested)
+_CONFIRM_TEMPLATES = {
+    (VerbosityLevel.CASUAL.value, 'movie', False): "👍 Gotcha! Requesting '{title}' for ya.",
+    (VerbosityLevel.CASUAL.value, 'tv', False): "👍 Gotcha! Requesting '{title}' for ya.",
+    (VerbosityLevel.CASUAL.value, 'tv', True): "👍 Gotcha! Requesting '{title}' seasons {first}-{last} for ya.",
+    (VerbosityLevel.SIMPLE.value, 'movie', False): "✅ Requested: {title}{year}\n⏱️ I'll check back in 2 minutes!",
+    (VerbosityLevel.SIMPLE.value, 'tv', False): "✅ Requested: {title}{year} (All seasons)\n⏱️ I'll check back in 2 minutes!",
+    (VerbosityLevel.SIMPLE.value, 'tv', True): "✅ Requested: {title}{year} (Seasons {first}-{last})\n⏱️ I'll check back in 2 minutes!",
+    (VerbosityLevel.VERBOSE.value, 'movie', False): (
+        "✅ **Request Submitted Successfully**\n\n"
+        "📺 **Title:** {title}{year}\n"
+        "🎬 **Type:** Movie\n"
+        "⏱️ **Status Check:** I'll update you in 2 minutes\n"
+        "🔄 **Current Status:** Processing request..."
+    ),
+    (VerbosityLevel.VERBOSE.value, 'tv', False): (
+        "✅ **Request Submitted Successfully**\n\n"
+        "📺 **Title:** {title}{year}\n"
+        "🎬 **Type:** Tv\n"
+        "⏱️ **Status Check:** I'll update you in 2 minutes\n"
+        "🔄 **Current Status:** Processing request..."
+    ),
+    (VerbosityLevel.VERBOSE.value, 'tv', True): (
+        "✅ **Request Submitted Successfully**\n\n"
+        "📺 **Title:** {title}{year}\n"
+        "🎬 **Type:** Tv\n"
+        "📅 **Seasons:** {first}-{last}\n"
+        "⏱️ **Status Check:** I'll update you in 2 minutes\n"
+        "🔄 **Current Status:** Processing request..."
+    ),
+}
+
 class MessageHandler:
-    def __init__(self, signal_client: SignalClient, overseerr_api: OverseerrAPI):
+    def __init__(self, signal_client: SignalClient, overseerr_api: OverseerrAPI, log_buffer: LogBuffer = None):
         self.signal_client = signal_client
         self.overseerr_api = overseerr_api
+        
+        # user_id -> last message time, written in batches by flush_last_active()
+        self._last_active = {}
+        self._last_active_lock = threading.Lock()
+        
+        # Runs Overseerr calls alongside DB work on the handler thread
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='handler-io')
+        
+        # Queue activity logs for batched writes when a buffer is available
+        self.log = log_buffer.add if log_buffer else LogCRUD.create_log
         self.commands = {
             'help': self.handle_help,
             'request': self.handle_request,
@@ -36,6 +96,16 @@ class MessageHandler:
             'broadcast': self.handle_broadcast,
             'stats': self.handle_stats,
         }
+        
+        # Used to tell mistyped commands apart from free-text requests
+        self._command_prefix_re = re.compile(
+            r'^(?:' + '|'.join(re.escape(name) for name in self.commands) + r')\b',
+            re.IGNORECASE
+        )
+        
+        # command -> (handler, admin_required)
+        self._dispatch = {name: (handler, False) for name, handler in self.commands.items()}
+        self._dispatch.update((name, (handler, True)) for name, handler in self.admin_commands.items())
     
     def handle_message(self, message: SignalMessage):
         """Main message handler"""
@@ -47,7 +117,7 @@ class MessageHandler:
                 return
             
             # Log the message
-            LogCRUD.create_log(
+            self.log(
                 level='INFO',
                 message=f"Received message from {sender}: {text[:100]}",
                 module='message_handler'
@@ -60,8 +130,9 @@ class MessageHandler:
                 self.send_response(sender, "❌ You are not authorized to use this bot. Please contact an administrator.", message)
                 return
             
-            # Update user's last active time
-            UserCRUD.update_user(user.id, last_active=datetime.utcnow())
+            # Record activity; the DB write happens in the next batch
+            with self._last_active_lock:
+                self._last_active[user.id] = datetime.utcnow()
             
             # Check if bot is in maintenance mode
             if SettingsCRUD.get_setting('maintenance_mode', 'false').lower() == 'true' and not user.is_admin:
@@ -71,21 +142,40 @@ class MessageHandler:
             # Parse command
             command, args = self.parse_command(text)
             
-            if command in self.commands:
-                self.commands[command](user, args, message)
-            elif command in self.admin_commands:
-                if user.is_admin:
-                    self.admin_commands[command](user, args, message)
-                else:
-                    self.send_response(sender, "❌ You don't have permission to use this command.", message)
-            else:
+            entry = self._dispatch.get(command)
+            if entry is None:
                 # Try to interpret as a search/request
                 self.handle_natural_request(user, text, message)
+                return
+            
+            handler, admin_required = entry
+            if admin_required and not user.is_admin:
+                self.send_response(sender, "❌ You don't have permission to use this command.", message)
+            else:
+                handler(user, args, message)
                 
         except Exception as e:
             logger.error(f"Error handling message from {message.get_sender()}: {e}")
             self.send_error_to_admins(f"Error handling message: {e}", message.get_sender())
     
+    def flush_last_active(self):
+        """Write the last active times recorded since the previous flush"""
+        with self._last_active_lock:
+            pending, self._last_active = self._last_active, {}
+        
+        if not pending:
+            return
+        
+        try:
+            UserCRUD.bulk_update_last_active(pending)
+        except Exception as e:
+            logger.error(f"Failed to update last active times: {e}")
+            
+            # Put them back unless a newer time arrived meanwhile
+            with self._last_active_lock:
+                for user_id, timestamp in pending.items():
+                    self._last_active.setdefault(user_id, timestamp)
+    
     def parse_command(self, text: str) -> Tuple[str, List[str]]:
         """Parse command and arguments from message text"""
         parts = text.strip().split()
@@ -112,15 +202,14 @@ class MessageHandler:
     def send_error_to_admins(self, error_message: str, user_phone: str = None):
         """Send error notification to admin users"""
         try:
-            admin_phones = SettingsCRUD.get_setting('admin_phone_numbers', '').split(',')
-            admin_phones = [phone.strip() for phone in admin_phones if phone.strip()]
+            admin_phones = SettingsCRUD.get_admin_phones()
             
             message = f"🚨 Signalerr Error\n\n{error_message}"
             if user_phone:
                 message += f"\n\nUser: {user_phone}"
             
-            for admin_phone in admin_phones:
-                self.signal_client.send_message(admin_phone, message)
+            # Don't hold up the user's reply on the admin alert
+            self.signal_client.send_message_to_recipients_async(admin_phones, message)
                 
         except Exception as e:
             logger.error(f"Failed to send error to admins: {e}")
@@ -181,7 +270,7 @@ You can also just type the name of a movie or show to request it!"""
     def handle_natural_request(self, user, text, message):
         """Handle natural language requests"""
         # Skip if it looks like a command
-        if text.startswith('/') or text.lower().startswith(tuple(self.commands.keys())):
+        if text.startswith('/') or self._command_prefix_re.match(text):
             self.send_response(user.phone_number, "❓ Unknown command. Type `help` for available commands.", message)
             return
         
@@ -200,10 +289,13 @@ You can also just type the name of a movie or show to request it!"""
                 )
                 return
             
-            # Search for media
-            self.send_response(user.phone_number, f"🔍 Searching for '{query}'...", message)
+            # Search for media, only sending a progress message if it's slow
+            search = self._io_pool.submit(self.overseerr_api.search_media, query)
+            done, _ = wait([search], timeout=0.5)
+            if not done:
+                self.send_response(user.phone_number, f"🔍 Searching for '{query}'...", message)
             
-            search_results = self.overseerr_api.search_media(query)
+            search_results = search.result()
             
             if not search_results:
                 self.send_response(user.phone_number, f"❌ No results found for '{query}'. Try a different search term.", message)
@@ -214,35 +306,35 @@ You can also just type the name of a movie or show to request it!"""
             media_info = self.overseerr_api.parse_media_info(best_match)
             
             # Check if already available
-            if self.overseerr_api.is_media_available(media_info['tmdb_id']):
+            if media_info.available:
                 self.send_response(
                     user.phone_number,
-                    f"✅ '{media_info['title']}' is already available!",
+                    f"✅ '{media_info.title}' is already available!",
                     message
                 )
                 return
             
             # Handle TV shows with season selection
             seasons_to_request = None
-            if media_info['media_type'] == 'tv':
+            if media_info.media_type == 'tv':
                 seasons_to_request = self.determine_seasons_to_request(media_info, query)
             
             # Create request in database
             db_request = MediaRequestCRUD.create_request(
                 user_id=user.id,
-                media_type=media_info['media_type'],
-                media_id=media_info['tmdb_id'],
-                title=media_info['title'],
-                year=media_info.get('year'),
+                media_type=media_info.media_type,
+                media_id=media_info.tmdb_id,
+                title=media_info.title,
+                year=media_info.year,
                 seasons=seasons_to_request
             )
             
             # Submit to Overseerr
-            if media_info['media_type'] == 'movie':
-                success, overseerr_id, error = self.overseerr_api.request_movie(media_info['tmdb_id'])
+            if media_info.media_type == 'movie':
+                success, overseerr_id, error = self.overseerr_api.request_movie(media_info.tmdb_id)
             else:
                 success, overseerr_id, error = self.overseerr_api.request_tv_show(
-                    media_info['tmdb_id'], 
+                    media_info.tmdb_id, 
                     seasons_to_request
                 )
             
@@ -264,26 +356,27 @@ You can also just type the name of a movie or show to request it!"""
             else:
                 # Update request with error
                 MediaRequestCRUD.update_request_status(db_request.id, 'failed', error_message=error)
-                self.send_response(user.phone_number, f"❌ Failed to request '{media_info['title']}': {error}", message)
+                self.send_response(user.phone_number, f"❌ Failed to request '{media_info.title}': {error}", message)
                 
         except Exception as e:
             logger.error(f"Error processing request for {user.phone_number}: {e}")
             self.send_response(user.phone_number, "❌ An error occurred while processing your request. Please try again.", message)
             self.send_error_to_admins(f"Request processing error: {e}", user.phone_number)
     
-    def determine_seasons_to_request(self, media_info: Dict, query: str) -> Optional[List[int]]:
+    def determine_seasons_to_request(self, media_info: ParsedMedia, query: str) -> Optional[List[int]]:
         """Determine which seasons to request for TV shows"""
-        total_seasons = media_info.get('seasons', 0)
+        total_seasons = media_info.seasons
+        query_lower = query.lower()
         
         # Check if user specified seasons in query
-        season_match = re.search(r'season[s]?\s*(\d+)(?:\s*[-–]\s*(\d+))?', query.lower())
+        season_match = _SEASON_RE.search(query_lower)
         if season_match:
             start_season = int(season_match.group(1))
             end_season = int(season_match.group(2)) if season_match.group(2) else start_season
             return list(range(start_season, end_season + 1))
         
         # Check for "latest" or "recent" keywords
-        if any(word in query.lower() for word in ['latest', 'recent', 'new', 'current']):
+        if not _LATEST_WORDS.isdisjoint(query_lower.split()):
             if total_seasons >= 4:
                 return list(range(max(1, total_seasons - 3), total_seasons + 1))
         
@@ -295,37 +388,19 @@ You can also just type the name of a movie or show to request it!"""
         # Request all seasons for shows with < 4 seasons
         return None
     
-    def format_request_confirmation(self, media_info: Dict, seasons: List[int], verbosity: VerbosityLevel) -> str:
+    def format_request_confirmation(self, media_info: ParsedMedia, seasons: List[int], verbosity: str) -> str:
         """Format request confirmation message based on verbosity level"""
-        title = media_info['title']
-        year = f" ({media_info['year']})" if media_info.get('year') else ""
-        
-        if verbosity == VerbosityLevel.CASUAL:
-            if media_info['media_type'] == 'movie':
-                return f"👍 Gotcha! Requesting '{title}' for ya."
-            else:
-                season_text = f" seasons {seasons[0]}-{seasons[-1]}" if seasons else ""
-                return f"👍 Gotcha! Requesting '{title}'{season_text} for ya."
+        has_seasons = media_info.media_type == 'tv' and bool(seasons)
+        template = _CONFIRM_TEMPLATES.get((verbosity, media_info.media_type, has_seasons))
+        if template is None:
+            template = _CONFIRM_TEMPLATES[(VerbosityLevel.VERBOSE.value, media_info.media_type, has_seasons)]
         
-        elif verbosity == VerbosityLevel.SIMPLE:
-            if media_info['media_type'] == 'movie':
-                return f"✅ Requested: {title}{year}\n⏱️ I'll check back in 2 minutes!"
-            else:
-                season_text = f" (Seasons {seasons[0]}-{seasons[-1]})" if seasons else " (All seasons)"
-                return f"✅ Requested: {title}{year}{season_text}\n⏱️ I'll check back in 2 minutes!"
-        
-        else:  # VERBOSE
-            base_msg = f"✅ **Request Submitted Successfully**\n\n"
-            base_msg += f"📺 **Title:** {title}{year}\n"
-            base_msg += f"🎬 **Type:** {media_info['media_type'].title()}\n"
-            
-            if media_info['media_type'] == 'tv' and seasons:
-                base_msg += f"📅 **Seasons:** {seasons[0]}-{seasons[-1]}\n"
-            
-            base_msg += f"⏱️ **Status Check:** I'll update you in 2 minutes\n"
-            base_msg += f"🔄 **Current Status:** Processing request..."
-            
-            return base_msg
+        return template.format(
+            title=media_info.title,
+            year=f" ({media_info.year})" if media_info.year else "",
+            first=seasons[0] if has_seasons else None,
+            last=seasons[-1] if has_seasons else None
+        )
     
     def handle_search(self, user, args, message):
         """Handle search command"""
@@ -343,19 +418,19 @@ You can also just type the name of a movie or show to request it!"""
                 return
             
             # Format results (show top 5)
-            response = f"🔍 **Search Results for '{query}':**\n\n"
+            parts = [f"🔍 **Search Results for '{query}':**\n\n"]
             
             for i, result in enumerate(results[:5], 1):
                 media_info = self.overseerr_api.parse_media_info(result)
-                title = media_info['title']
-                year = f" ({media_info['year']})" if media_info.get('year') else ""
-                media_type = media_info['media_type'].title()
+                title = media_info.title
+                year = f" ({media_info.year})" if media_info.year else ""
+                media_type = media_info.media_type.title()
                 
-                response += f"{i}. {title}{year} [{media_type}]\n"
+                parts.append(f"{i}. {title}{year} [{media_type}]\n")
             
-            response += f"\nTo request any of these, just type: `request [title]`"
+            parts.append("\nTo request any of these, just type: `request [title]`")
             
-            self.send_response(user.phone_number, response, message)
+            self.send_response(user.phone_number, ''.join(parts), message)
             
         except Exception as e:
             logger.error(f"Search error for {user.phone_number}: {e}")
@@ -370,21 +445,17 @@ You can also just type the name of a movie or show to request it!"""
                 self.send_response(user.phone_number, "📭 You haven't made any requests yet.", message)
                 return
             
-            response = "📊 **Your Recent Requests:**\n\n"
+            parts = ["📊 **Your Recent Requests:**\n\n"]
             
             for req in recent_requests:
-                status_emoji = self.get_status_emoji(req.status)
-                response += f"{status_emoji} {req.title}"
-                
-                if req.year:
-                    response += f" ({req.year})"
-                
-                response += f" - {req.status.value.title()}\n"
+                status_emoji = _STATUS_EMOJI.get(req.status, "❓")
+                year = f" ({req.year})" if req.year else ""
+                parts.append(f"{status_emoji} {req.title}{year} - {req.status.title()}\n")
                 
                 if req.error_message:
-                    response += f"   ❌ {req.error_message}\n"
+                    parts.append(f"   ❌ {req.error_message}\n")
             
-            self.send_response(user.phone_number, response, message)
+            self.send_response(user.phone_number, ''.join(parts), message)
             
         except Exception as e:
             logger.error(f"Status check error for {user.phone_number}: {e}")
@@ -399,48 +470,36 @@ You can also just type the name of a movie or show to request it!"""
                 self.send_response(user.phone_number, "📭 You haven't made any requests yet.", message)
                 return
             
-            response = f"📋 **All Your Requests ({len(all_requests)}):**\n\n"
+            parts = [f"📋 **All Your Requests ({len(all_requests)}):**\n\n"]
             
             for req in all_requests:
-                status_emoji = self.get_status_emoji(req.status)
-                response += f"{status_emoji} #{req.id} {req.title}"
-                
-                if req.year:
-                    response += f" ({req.year})"
-                
-                response += f" - {req.status.value.title()}\n"
+                status_emoji = _STATUS_EMOJI.get(req.status, "❓")
+                year = f" ({req.year})" if req.year else ""
+                parts.append(f"{status_emoji} #{req.id} {req.title}{year} - {req.status.title()}\n")
                 
                 if req.completed_at:
-                    response += f"   ✅ Completed: {req.completed_at.strftime('%m/%d %H:%M')}\n"
+                    parts.append(f"   ✅ Completed: {req.completed_at:%m/%d %H:%M}\n")
                 elif req.error_message:
-                    response += f"   ❌ Error: {req.error_message}\n"
+                    parts.append(f"   ❌ Error: {req.error_message}\n")
             
-            response += f"\nDaily requests used: {user.get_daily_request_count()}/{user.daily_request_limit}"
+            parts.append(f"\nDaily requests used: {user.get_daily_request_count()}/{user.daily_request_limit}")
             
-            self.send_response(user.phone_number, response, message)
+            self.send_response(user.phone_number, ''.join(parts), message)
             
         except Exception as e:
             logger.error(f"My requests error for {user.phone_number}: {e}")
             self.send_response(user.phone_number, "❌ Failed to get your requests. Please try again.", message)
     
-    def get_status_emoji(self, status: RequestStatus) -> str:
+    def get_status_emoji(self, status: str) -> str:
         """Get emoji for request status"""
-        emoji_map = {
-            RequestStatus.PENDING: "⏳",
-            RequestStatus.APPROVED: "✅",
-            RequestStatus.DOWNLOADING: "⬇️",
-            RequestStatus.COMPLETED: "🎉",
-            RequestStatus.FAILED: "❌",
-            RequestStatus.DECLINED: "❌"
-        }
-        return emoji_map.get(status, "❓")
+        return _STATUS_EMOJI.get(status, "❓")
     
     def handle_settings(self, user, args, message):
         """Handle settings command"""
         if not args:
             # Show current settings
             response = f"⚙️ **Your Settings:**\n\n"
-            response += f"🔊 **Verbosity:** {user.verbosity_level.value}\n"
+            response += f"🔊 **Verbosity:** {user.verbosity_level}\n"
             response += f"🔔 **Auto Notifications:** {'On' if user.auto_notifications else 'Off'}\n"
             response += f"📊 **Daily Limit:** {user.daily_request_limit}\n"
             response += f"📈 **Today's Requests:** {user.get_daily_request_count()}/{user.daily_request_limit}\n\n"
@@ -456,7 +515,7 @@ You can also just type the name of a movie or show to request it!"""
         if setting_type == 'verbosity' and len(args) > 1:
             verbosity = args[1].lower()
             if verbosity in ['verbose', 'simple', 'casual']:
-                UserCRUD.update_user(user.id, verbosity_level=VerbosityLevel(verbosity))
+                UserCRUD.update_user(user.id, verbosity_level=VerbosityLevel(verbosity).value)
                 self.send_response(user.phone_number, f"✅ Verbosity set to '{verbosity}'", message)
             else:
                 self.send_response(user.phone_number, "❌ Invalid verbosity. Use: verbose, simple, or casual", message)
@@ -516,7 +575,7 @@ You can also just type the name of a movie or show to request it!"""
             
             # Welcome the new user
             welcome_msg = f"🎉 Welcome to Signalerr! You've been added by an admin.\n\nType `help` to see available commands."
-            self.signal_client.send_message(phone, welcome_msg)
+            self.signal_client.send_message_async(phone, welcome_msg)
             
         except Exception as e:
             logger.error(f"Add user error: {e}")
@@ -552,42 +611,79 @@ You can also just type the name of a movie or show to request it!"""
                 self.send_response(user.phone_number, "📭 No users found", message)
                 return
             
-            response = f"👥 **All Users ({len(users)}):**\n\n"
+            # One grouped query instead of a count per user
+            daily_counts = MediaRequestCRUD.get_daily_counts_for_all_users()
+            
+            parts = [f"👥 **All Users ({len(users)}):**\n\n"]
             
             for u in users:
                 status = "👑" if u.is_admin else "👤"
-                response += f"{status} {u.phone_number}"
-                if u.display_name:
-                    response += f" ({u.display_name})"
-                response += f" - {u.get_daily_request_count()}/{u.daily_request_limit} requests today\n"
+                display_name = f" ({u.display_name})" if u.display_name else ""
+                parts.append(f"{status} {u.phone_number}{display_name} - {daily_counts.get(u.id, 0)}/{u.daily_request_limit} requests today\n")
             
-            self.send_response(user.phone_number, response, message)
+            self.send_response(user.phone_number, ''.join(parts), message)
             
         except Exception as e:
             logger.error(f"List users error: {e}")
             self.send_response(user.phone_number, "❌ Failed to list users", message)
     
+    def handle_broadcast(self, user, args, message):
+        """Handle broadcast command (admin only)"""
+        if not args:
+            self.send_response(user.phone_number, "❌ Usage: `broadcast <message>`", message)
+            return
+        
+        # Keep the admin's own line breaks instead of re-joining args
+        text = message.get_text().split(None, 1)[1]
+        
+        try:
+            recipients = [u.phone_number for u in UserCRUD.get_all_users() if u.phone_number != user.phone_number]
+            if not recipients:
+                self.send_response(user.phone_number, "📭 No users to broadcast to", message)
+                return
+            
+            # One multi-recipient send; signal-cli delivers to all of them in a single call
+            if self.signal_client.send_message_to_recipients(recipients, f"📢 {text}"):
+                self.send_response(user.phone_number, f"✅ Broadcast sent to {len(recipients)} users", message)
+            else:
+                self.send_response(user.phone_number, "⚠️ Broadcast could not be delivered to every user, check the logs", message)
+            
+        except Exception as e:
+            logger.error(f"Broadcast error: {e}")
+            self.send_response(user.phone_number, "❌ Failed to send broadcast", message)
+    
     def handle_stats(self, user, args, message):
         """Handle stats command (admin only)"""
         try:
+            # Probe Overseerr while the counts run
+            connection_check = self._io_pool.submit(self.overseerr_api.test_connection)
+            
             # Get various statistics
-            total_users = len(UserCRUD.get_all_users())
-            recent_requests = MediaRequestCRUD.get_recent_requests(days=7)
-            pending_requests = MediaRequestCRUD.get_requests_by_status('pending')
-            completed_requests = MediaRequestCRUD.get_requests_by_status('completed')
+            total_users = UserCRUD.count_users()
+            recent_requests = MediaRequestCRUD.count_recent_requests(days=7)
+            pending_requests = MediaRequestCRUD.count_requests_by_status('pending')
+            completed_requests = MediaRequestCRUD.count_requests_by_status('completed')
             
             response = f"📊 **Bot Statistics:**\n\n"
             response += f"👥 **Total Users:** {total_users}\n"
-            response += f"📋 **Requests (7 days):** {len(recent_requests)}\n"
-            response += f"⏳ **Pending Requests:** {len(pending_requests)}\n"
-            response += f"✅ **Completed Requests:** {len(completed_requests)}\n"
+            response += f"📋 **Requests (7 days):** {recent_requests}\n"
+            response += f"⏳ **Pending Requests:** {pending_requests}\n"
+            response += f"✅ **Completed Requests:** {completed_requests}\n"
             
             # Overseerr connection status
-            if self.overseerr_api.test_connection():
+            if connection_check.result():
                 response += f"🟢 **Overseerr:** Connected\n"
             else:
                 response += f"🔴 **Overseerr:** Disconnected\n"
             
+            # Overseerr call metrics since startup, busiest first
+            metrics = self.overseerr_api.get_metrics()
+            if metrics:
+                response += f"\n📡 **Overseerr Calls:**\n"
+                for name, stats in sorted(metrics.items(), key=lambda item: -item[1]['calls']):
+                    average_ms = stats['seconds'] / stats['calls'] * 1000
+                    response += f"• {name}: {stats['calls']} calls, {stats['errors']} errors, avg {average_ms:.0f}ms\n"
+            
             self.send_response(user.phone_number, response, message)
             
         except Exception as e:
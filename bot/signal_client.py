@@ -1,35 +1,64 @@
 
 import subprocess
-import json
+import orjson
 import logging
 import asyncio
 import threading
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Callable
 from datetime import datetime
 import os
+import selectors
 import signal
 
 logger = logging.getLogger(__name__)
 
+class SignalRpcError(Exception):
+    """signal-cli answered a JSON-RPC call with an error"""
+
 class SignalMessage:
+    # Envelopes arrive at message rate and most are only read for sender and text,
+    # so fields are looked up on access instead of copied into a per-instance dict
+    __slots__ = ('raw_data', 'envelope', '_data_message')
+    
     def __init__(self, data: Dict):
         self.raw_data = data
         self.envelope = data.get('envelope', {})
-        self.source = self.envelope.get('source', '')
-        self.source_number = self.envelope.get('sourceNumber', '')
-        self.timestamp = self.envelope.get('timestamp', 0)
-        
-        # Message content
-        data_message = self.envelope.get('dataMessage', {})
-        self.message = data_message.get('message', '')
-        self.group_info = data_message.get('groupInfo')
-        self.attachments = data_message.get('attachments', [])
-        
-        # Group information
-        self.is_group_message = self.group_info is not None
-        self.group_id = self.group_info.get('groupId') if self.group_info else None
-        
+        self._data_message = self.envelope.get('dataMessage') or {}
+    
+    @property
+    def source(self) -> str:
+        return self.envelope.get('source', '')
+    
+    @property
+    def source_number(self) -> str:
+        return self.envelope.get('sourceNumber', '')
+    
+    @property
+    def timestamp(self) -> int:
+        return self.envelope.get('timestamp', 0)
+    
+    @property
+    def message(self) -> str:
+        return self._data_message.get('message') or ''
+    
+    @property
+    def group_info(self) -> Optional[Dict]:
+        return self._data_message.get('groupInfo')
+    
+    @property
+    def attachments(self) -> List[Dict]:
+        return self._data_message.get('attachments', [])
+    
+    @property
+    def is_group_message(self) -> bool:
+        return self.group_info is not None
+    
+    @property
+    def group_id(self) -> Optional[str]:
+        group_info = self.group_info
+        return group_info.get('groupId') if group_info else None
+    
     def is_from_user(self, phone_number: str) -> bool:
         """Check if message is from specific user"""
         return self.source_number == phone_number or self.source == phone_number
@@ -53,7 +82,8 @@ class SignalMessage:
         }
 
 class SignalClient:
-    def __init__(self, phone_number: str, signal_cli_path: str = '/usr/local/bin/signal-cli', config_dir: str = None):
+    def __init__(self, phone_number: str, signal_cli_path: str = '/usr/local/bin/signal-cli', config_dir: str = None,
+                 max_workers: int = 8):
         self.phone_number = phone_number
         self.signal_cli_path = signal_cli_path
         self.config_dir = config_dir or f"/home/signal/.local/share/signal-cli"
@@ -61,7 +91,23 @@ class SignalClient:
         self.is_running = False
         self.daemon_process = None
         self.receive_thread = None
+        self.max_workers = max_workers
+        self.restart_delay = 5
+        self._handler_pool = None
+        self._stopped = threading.Event()
         
+        # Fire-and-forget sends run here so callers don't wait on signal-cli
+        self._send_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='signal-send')
+        
+        # Striped locks so a user's messages are handled one at a time. A fixed set keyed
+        # by hash(sender) keeps memory flat however many numbers (or spammers) write in.
+        self._sender_locks = tuple(threading.Lock() for _ in range(64))
+        
+        # JSON-RPC calls awaiting a response from the daemon, by request ID
+        self._pending = {}
+        self._rpc_id = 0
+        self._rpc_lock = threading.Lock()
+    
     def add_message_handler(self, handler: Callable[[SignalMessage], None]):
         """Add a message handler function"""
         self.message_handlers.append(handler)
@@ -95,9 +141,64 @@ class SignalClient:
             logger.error(f"Failed to run signal command: {e}")
             raise
     
+    def _rpc_available(self) -> bool:
+        """Whether the JSON-RPC daemon is up to take commands"""
+        return self.daemon_process is not None and self.daemon_process.poll() is None
+    
+    def _rpc_call(self, method: str, params: Dict = None, timeout: float = 30):
+        """Call a method on the running signal-cli daemon and wait for its result"""
+        if not self._rpc_available():
+            raise SignalRpcError("signal-cli daemon is not running")
+        
+        future = Future()
+        with self._rpc_lock:
+            self._rpc_id += 1
+            request_id = self._rpc_id
+            self._pending[request_id] = future
+            
+            request = {'jsonrpc': '2.0', 'id': request_id, 'method': method}
+            if params:
+                request['params'] = params
+            
+            try:
+                self.daemon_process.stdin.write(orjson.dumps(request) + b'\n')
+                self.daemon_process.stdin.flush()
+            except Exception:
+                self._pending.pop(request_id, None)
+                raise
+        
+        try:
+            response = future.result(timeout=timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        
+        if 'error' in response:
+            raise SignalRpcError(response['error'].get('message', 'unknown error'))
+        return response.get('result')
+    
+    def _fail_pending(self, error: Exception):
+        """Fail every in-flight RPC call, e.g. when the daemon goes away"""
+        with self._rpc_lock:
+            pending, self._pending = self._pending, {}
+        
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+    
     def send_message(self, recipient: str, message: str, group_id: str = None) -> bool:
         """Send a message to a recipient or group"""
         try:
+            if self._rpc_available():
+                params = {'message': message}
+                if group_id:
+                    params['groupId'] = group_id
+                else:
+                    params['recipient'] = [recipient]
+                
+                self._rpc_call('send', params)
+                logger.info(f"Message sent to {recipient or group_id}")
+                return True
+            
             args = ['send', '-m', message]
             
             if group_id:
@@ -113,11 +214,58 @@ class SignalClient:
             else:
                 logger.error(f"Failed to send message: {result.stderr}")
                 return False
-                
+        
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            return False
+    
+    def send_message_async(self, recipient: str, message: str, group_id: str = None) -> Future:
+        """Send a message in the background; the Future resolves to send_message's result"""
+        return self._send_pool.submit(self.send_message, recipient, message, group_id)
+    
+    def send_message_to_recipients_async(self, recipients: List[str], message: str) -> Future:
+        """Send to several recipients in the background"""
+        return self._send_pool.submit(self.send_message_to_recipients, list(recipients), message)
+    
+    def send_message_to_recipients(self, recipients: List[str], message: str) -> bool:
+        """Send the same message to several recipients with one signal-cli call"""
+        if not recipients:
+            return True
+        
+        try:
+            if self._rpc_available():
+                result = self._rpc_call('send', {'recipient': list(recipients), 'message': message})
+                failed = self._failed_recipients(result)
+                logger.info(f"Message sent to {len(recipients) - len(failed)} of {len(recipients)} recipients")
+                return not failed
+            
+            result = self._run_signal_command(['send', '-m', message] + list(recipients))
+            
+            if result.returncode == 0:
+                logger.info(f"Message sent to {len(recipients)} recipients")
+                return True
+            else:
+                logger.error(f"Failed to send message: {result.stderr}")
+                return False
+        
         except Exception as e:
             logger.error(f"Error sending message: {e}")
             return False
     
+    def _failed_recipients(self, result: Optional[Dict]) -> List[str]:
+        """Log and return the recipients a JSON-RPC send result reports as not delivered"""
+        failed = []
+        for target in (result or {}).get('results', []):
+            if target.get('type', 'SUCCESS') == 'SUCCESS':
+                continue
+            
+            address = target.get('recipientAddress', {})
+            recipient = address.get('number') or address.get('uuid', 'unknown')
+            logger.warning(f"Message to {recipient} not delivered: {target.get('type')}")
+            failed.append(recipient)
+        
+        return failed
+    
     def send_message_to_group(self, group_id: str, message: str) -> bool:
         """Send message to a group"""
         return self.send_message(None, message, group_id)
@@ -125,6 +273,11 @@ class SignalClient:
     def create_group(self, name: str, members: List[str]) -> Optional[str]:
         """Create a new group"""
         try:
+            if self._rpc_available():
+                result = self._rpc_call('updateGroup', {'name': name, 'member': members})
+                logger.info(f"Group created: {name}")
+                return (result or {}).get('groupId')
+            
             args = ['updateGroup', '-n', name] + members
             result = self._run_signal_command(args)
             
@@ -137,7 +290,7 @@ class SignalClient:
             else:
                 logger.error(f"Failed to create group: {result.stderr}")
                 return None
-                
+        
         except Exception as e:
             logger.error(f"Error creating group: {e}")
             return None
@@ -145,72 +298,81 @@ class SignalClient:
     def list_groups(self) -> List[Dict]:
         """List all groups"""
         try:
+            if self._rpc_available():
+                return self._rpc_call('listGroups') or []
+            
             result = self._run_signal_command(['listGroups'])
             
             if result.returncode == 0:
                 # Parse groups from output
                 groups = []
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
+                for line in result.stdout.splitlines():
+                    if line:
                         # Parse group information (format may vary)
                         groups.append({'raw': line})
                 return groups
             else:
                 logger.error(f"Failed to list groups: {result.stderr}")
                 return []
-                
+        
         except Exception as e:
             logger.error(f"Error listing groups: {e}")
             return []
     
     def receive_messages(self) -> List[SignalMessage]:
-        """Receive pending messages"""
+        """Receive pending messages with a one-off signal-cli run (only when not listening)"""
+        if self._rpc_available():
+            # The daemon already pushes every message to the handlers, and a second
+            # signal-cli process would contend with it for the account
+            logger.warning("receive_messages called while the daemon is listening; messages go to the handlers")
+            return []
+        
         try:
             result = self._run_signal_command(['receive', '--json'])
             
             if result.returncode == 0 and result.stdout.strip():
                 messages = []
-                for line in result.stdout.strip().split('\n'):
-                    if line.strip():
+                for line in result.stdout.splitlines():
+                    if line:
                         try:
-                            data = json.loads(line)
-                            message = SignalMessage(data)
-                            messages.append(message)
-                        except json.JSONDecodeError as e:
+                            messages.append(SignalMessage(orjson.loads(line)))
+                        except orjson.JSONDecodeError as e:
                             logger.warning(f"Failed to parse message JSON: {e}")
-                            continue
                 
                 return messages
             else:
                 return []
-                
+        
         except Exception as e:
             logger.error(f"Error receiving messages: {e}")
             return []
     
     def start_daemon(self) -> bool:
-        """Start signal-cli in daemon mode for real-time message receiving"""
+        """Start signal-cli as a JSON-RPC daemon on stdin/stdout.
+        
+        Incoming messages arrive as 'receive' notifications, and sends go over
+        the same pipe, so the JVM starts once instead of per command.
+        """
         try:
             cmd = [
                 self.signal_cli_path,
                 '-a', self.phone_number,
                 '--config', self.config_dir,
-                'daemon',
-                '--json'
+                'jsonRpc'
             ]
             
+            # stderr is inherited so signal-cli's own logging can't fill an unread pipe.
+            # The pipes stay binary: orjson reads and writes bytes, so there is no
+            # text layer decoding and translating newlines on every line.
             self.daemon_process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE
             )
             
             logger.info("Signal daemon started")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to start signal daemon: {e}")
             return False
@@ -219,45 +381,117 @@ class SignalClient:
         """Stop the signal daemon"""
         if self.daemon_process:
             try:
-                self.daemon_process.terminate()
+                # Closing stdin asks jsonRpc mode to exit cleanly
+                self.daemon_process.stdin.close()
                 self.daemon_process.wait(timeout=5)
             except subprocess.TimeoutExpired:
-                self.daemon_process.kill()
-                self.daemon_process.wait()
+                try:
+                    self.daemon_process.terminate()
+                    self.daemon_process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.daemon_process.kill()
+                    self.daemon_process.wait()
             
             self.daemon_process = None
+            self._fail_pending(SignalRpcError("signal-cli daemon stopped"))
             logger.info("Signal daemon stopped")
     
     def _message_receiver_thread(self):
-        """Thread function to receive messages from daemon"""
-        while self.is_running and self.daemon_process:
-            try:
-                if self.daemon_process.poll() is not None:
-                    logger.error("Signal daemon process died")
-                    break
+        """Thread function to receive messages from daemon, restarting it if it dies"""
+        while self.is_running:
+            # stop_daemon may clear daemon_process from another thread, so work on one snapshot
+            process = self.daemon_process
+            if process is None:
+                break
+            
+            self._read_daemon_output(process)
+            self._fail_pending(SignalRpcError("signal-cli daemon stopped responding"))
+            
+            if not self.is_running:
+                break
+            
+            # Keep one long-lived receiver rather than falling back to polling
+            if process.poll() is None:
+                logger.error(f"Lost the Signal daemon's output, restarting it in {self.restart_delay}s")
+            else:
+                logger.error(f"Signal daemon process died, restarting in {self.restart_delay}s")
+            if self._stopped.wait(self.restart_delay):
+                break
+            
+            # The reader can also stop with the daemon still up; a live process would never be reaped
+            if process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            process.wait()
+            if not self.is_running or not self.start_daemon():
+                break
+            
+            # stop_listening ran while the new daemon was starting; don't leave it behind
+            if self._stopped.is_set():
+                self.stop_daemon()
+                break
+    
+    def _read_daemon_output(self, process: subprocess.Popen):
+        """Dispatch the daemon's output lines until it exits or listening stops"""
+        fd = process.stdout.fileno()
+        pending = b''
+        
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(fd, selectors.EVENT_READ)
                 
-                line = self.daemon_process.stdout.readline()
-                if line:
-                    try:
-                        data = json.loads(line.strip())
-                        message = SignalMessage(data)
-                        
-                        # Call all message handlers
-                        for handler in self.message_handlers:
-                            try:
-                                handler(message)
-                            except Exception as e:
-                                logger.error(f"Message handler error: {e}")
-                    
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Failed to parse daemon message: {e}")
+                while self.is_running:
+                    # Sleep in the kernel until output arrives, waking once a second to
+                    # notice stop_listening. Raw reads keep select() and our buffer in sync.
+                    if not selector.select(timeout=1.0):
                         continue
-                
-                time.sleep(0.1)  # Small delay to prevent busy waiting
-                
-            except Exception as e:
-                logger.error(f"Error in message receiver thread: {e}")
-                break
+                    
+                    chunk = os.read(fd, 65536)
+                    if not chunk:
+                        break
+                    
+                    *lines, pending = (pending + chunk).split(b'\n')
+                    for line in lines:
+                        if not line.strip():
+                            continue
+                        
+                        try:
+                            self._handle_daemon_line(orjson.loads(line))
+                        except orjson.JSONDecodeError as e:
+                            logger.warning(f"Failed to parse daemon message: {e}")
+                        except Exception as e:
+                            # One odd line must not stop the reader for good
+                            logger.error(f"Failed to handle daemon message: {e}")
+        except Exception as e:
+            logger.error(f"Error in message receiver thread: {e}")
+    
+    def _handle_daemon_line(self, data: Dict):
+        """Route one JSON-RPC line from the daemon: a call result or an incoming message"""
+        if 'id' in data:
+            with self._rpc_lock:
+                future = self._pending.get(data['id'])
+            if future and not future.done():
+                future.set_result(data)
+            return
+        
+        if data.get('method') == 'receive':
+            message = SignalMessage(data.get('params') or {})
+            
+            # Hand off so a slow handler doesn't hold up the next message
+            self._handler_pool.submit(self._dispatch_message, message)
+    
+    def _dispatch_message(self, message: SignalMessage):
+        """Run all message handlers for one message, serialized per sender"""
+        sender = message.get_sender()
+        with self._sender_locks[hash(sender) % len(self._sender_locks)]:
+            for handler in self.message_handlers:
+                try:
+                    handler(message)
+                except Exception as e:
+                    logger.error(f"Message handler error: {e}")
     
     def start_listening(self) -> bool:
         """Start listening for messages"""
@@ -269,6 +503,8 @@ class SignalClient:
             return False
         
         self.is_running = True
+        self._stopped.clear()
+        self._handler_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='signal-handler')
         self.receive_thread = threading.Thread(target=self._message_receiver_thread, daemon=True)
         self.receive_thread.start()
         
@@ -278,10 +514,15 @@ class SignalClient:
     def stop_listening(self):
         """Stop listening for messages"""
         self.is_running = False
+        self._stopped.set()
         
         if self.receive_thread:
             self.receive_thread.join(timeout=5)
         
+        if self._handler_pool:
+            self._handler_pool.shutdown(wait=False)
+            self._handler_pool = None
+        
         self.stop_daemon()
         logger.info("Stopped listening for messages")
     
@@ -310,7 +551,7 @@ class SignalClient:
             else:
                 logger.error(f"Registration failed: {result.stderr}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error during registration: {e}")
             return False
@@ -330,7 +571,7 @@ class SignalClient:
             else:
                 logger.error(f"Verification failed: {result.stderr}")
                 return False
-                
+        
         except Exception as e:
             logger.error(f"Error during verification: {e}")
             return False
@@ -1,48 +1,52 @@
 
 import logging
 import re
+import time
+from collections import defaultdict, deque
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; these helpers run on every inbound message
+_SEASON_RE = re.compile(
+    r'seasons?\s*(?P<start>\d+)(?:\s*(?:[-–]|to)\s*(?P<end>\d+))?'
+    r'|s(?P<short_start>\d+)(?:\s*[-–]\s*s?(?P<short_end>\d+))?'
+)
+_YEAR_RE = re.compile(r'(\d{4})')
+_TMDB_URL_RE = re.compile(r'themoviedb\.org/(?:movie|tv)/(\d+)')
+_STOP_WORDS = frozenset(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+@lru_cache(maxsize=4096)
 def format_phone_number(phone: str) -> str:
     """Format phone number to international format"""
     # Remove all non-digit characters
-    digits = re.sub(r'\D', '', phone)
+    digits = ''.join(filter(str.isdecimal, phone))
     
     # Add + prefix if not present
-    if not phone.startswith('+'):
-        if len(digits) == 10:  # US number without country code
-            return f"+1{digits}"
-        elif len(digits) == 11 and digits.startswith('1'):  # US number with country code
-            return f"+{digits}"
-        else:
-            return f"+{digits}"
+    if not phone.startswith('+') and len(digits) == 10:  # US number without country code
+        return f"+1{digits}"
     
-    return phone
+    # Always rebuild from the digits so every spelling of a number maps to one string
+    return f"+{digits}"
 
 def validate_phone_number(phone: str) -> bool:
     """Validate phone number format"""
     # Should start with + and have 10-15 digits
-    pattern = r'^\+\d{10,15}$'
-    return bool(re.match(pattern, phone))
+    return 11 <= len(phone) <= 16 and phone[0] == '+' and phone[1:].isdecimal()
 
 def parse_seasons_from_text(text: str) -> Optional[List[int]]:
     """Parse season numbers from text"""
     # Look for patterns like "season 1", "seasons 1-3", "s1-s3", etc.
-    patterns = [
-        r'seasons?\s*(\d+)(?:\s*[-–]\s*(\d+))?',
-        r's(\d+)(?:\s*[-–]\s*s?(\d+))?',
-        r'season\s*(\d+)(?:\s*to\s*(\d+))?',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            start = int(match.group(1))
-            end = int(match.group(2)) if match.group(2) else start
-            return list(range(start, end + 1))
+    match = _SEASON_RE.search(text.lower())
+    if match:
+        start = int(match.group('start') or match.group('short_start'))
+        end = match.group('end') or match.group('short_end')
+        end = int(end) if end else start
+        return list(range(start, end + 1))
     
     return None
 
@@ -68,10 +72,8 @@ def truncate_text(text: str, max_length: int = 100) -> str:
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe storage"""
-    # Remove or replace unsafe characters
-    unsafe_chars = '<>:"/\\|?*'
-    for char in unsafe_chars:
-        filename = filename.replace(char, '_')
+    # Replace unsafe characters in a single pass
+    filename = filename.translate(_UNSAFE_FILENAME_TABLE)
     
     # Remove leading/trailing spaces and dots
     filename = filename.strip(' .')
@@ -82,24 +84,26 @@ def sanitize_filename(filename: str) -> str:
     
     return filename
 
+@lru_cache(maxsize=4096)
 def parse_media_year(date_string: str) -> Optional[int]:
     """Parse year from date string"""
     if not date_string:
         return None
     
-    try:
-        # Try to parse as ISO date
-        date_obj = datetime.fromisoformat(date_string.replace('Z', '+00:00'))
-        return date_obj.year
-    except:
+    # Release dates are ISO "YYYY-MM-DD", so the year is normally the first four characters
+    if date_string[:4].isdecimal():
+        year = int(date_string[:4])
+    else:
         # Try to extract year with regex
-        year_match = re.search(r'(\d{4})', date_string)
-        if year_match:
-            year = int(year_match.group(1))
-            # Validate year is reasonable
-            current_year = datetime.now().year
-            if 1900 <= year <= current_year + 5:
-                return year
+        year_match = _YEAR_RE.search(date_string)
+        if not year_match:
+            return None
+        year = int(year_match.group(1))
+    
+    # Validate year is reasonable
+    current_year = datetime.now().year
+    if 1900 <= year <= current_year + 5:
+        return year
     
     return None
 
@@ -108,21 +112,16 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f}{size_names[i]}"
+    # Each unit is 2**10 of the one before, so the bit length picks the unit
+    i = min(len(_SIZE_NAMES) - 1, max(int(size_bytes).bit_length() - 1, 0) // 10)
+    return f"{size_bytes / (1 << (i * 10)):.1f}{_SIZE_NAMES[i]}"
 
 def is_recent(timestamp: datetime, hours: int = 24) -> bool:
     """Check if timestamp is within recent hours"""
     if not timestamp:
         return False
     
-    cutoff = datetime.utcnow() - timedelta(hours=hours)
-    return timestamp > cutoff
+    return (datetime.utcnow() - timestamp).total_seconds() < hours * 3600
 
 def extract_tmdb_id(url_or_id: str) -> Optional[int]:
     """Extract TMDB ID from URL or return ID if already numeric"""
@@ -134,8 +133,7 @@ def extract_tmdb_id(url_or_id: str) -> Optional[int]:
         return int(url_or_id)
     
     # Try to extract from TMDB URL
-    tmdb_pattern = r'themoviedb\.org/(?:movie|tv)/(\d+)'
-    match = re.search(tmdb_pattern, url_or_id)
+    match = _TMDB_URL_RE.search(url_or_id)
     if match:
         return int(match.group(1))
     
@@ -147,12 +145,11 @@ def clean_search_query(query: str) -> str:
     query = ' '.join(query.split())
     
     # Remove common words that might interfere with search
-    stop_words = ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by']
     words = query.lower().split()
     
     # Only remove stop words if query has more than 2 words
     if len(words) > 2:
-        words = [word for word in words if word not in stop_words]
+        words = [word for word in words if word not in _STOP_WORDS]
         query = ' '.join(words)
     
     return query.strip()
@@ -211,44 +208,38 @@ class RateLimiter:
     """Simple rate limiter for user actions"""
     
     def __init__(self):
-        self.user_actions = {}
+        # key -> monotonic timestamps of recent actions, oldest first
+        self.user_actions = defaultdict(deque)
+    
+    def _recent_actions(self, user_id: str, action: str, window_seconds: int) -> deque:
+        """Get the action timestamps for a key with everything outside the window dropped"""
+        actions = self.user_actions[f"{user_id}:{action}"]
+        cutoff = time.monotonic() - window_seconds
+        while actions and actions[0] <= cutoff:
+            actions.popleft()
+        return actions
     
     def is_allowed(self, user_id: str, action: str, limit: int, window_seconds: int = 3600) -> bool:
         """Check if user action is allowed within rate limit"""
-        now = datetime.utcnow()
-        key = f"{user_id}:{action}"
-        
-        if key not in self.user_actions:
-            self.user_actions[key] = []
-        
-        # Clean old entries
-        cutoff = now - timedelta(seconds=window_seconds)
-        self.user_actions[key] = [
-            timestamp for timestamp in self.user_actions[key] 
-            if timestamp > cutoff
-        ]
+        actions = self._recent_actions(user_id, action, window_seconds)
         
         # Check if under limit
-        if len(self.user_actions[key]) >= limit:
+        if len(actions) >= limit:
             return False
         
         # Add current action
-        self.user_actions[key].append(now)
+        actions.append(time.monotonic())
         return True
     
     def get_remaining(self, user_id: str, action: str, limit: int, window_seconds: int = 3600) -> int:
         """Get remaining actions for user"""
-        now = datetime.utcnow()
         key = f"{user_id}:{action}"
-        
         if key not in self.user_actions:
             return limit
         
-        # Clean old entries
-        cutoff = now - timedelta(seconds=window_seconds)
-        self.user_actions[key] = [
-            timestamp for timestamp in self.user_actions[key] 
-            if timestamp > cutoff
-        ]
+        actions = self._recent_actions(user_id, action, window_seconds)
+        if not actions:
+            del self.user_actions[key]
+            return limit
         
-        return max(0, limit - len(self.user_actions[key]))
+        return max(0, limit - len(actions))
@@ -0,0 +1,95 @@
+
+import asyncio
+import hmac
+import logging
+import threading
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+class WebhookServer:
+    """Receives Overseerr webhook notifications and hands them to the bot"""
+    
+    def __init__(self, handler, host: str = '0.0.0.0', port: int = 8081, secret: str = None):
+        if not secret:
+            raise ValueError("Webhook server requires a secret")
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.secret = secret.encode()
+        self.loop = None
+        self.runner = None
+        self.thread = None
+    
+    async def handle_overseerr(self, request: web.Request) -> web.Response:
+        """Handle POST /webhook/overseerr"""
+        authorization = request.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(authorization, self.secret):
+            logger.warning(f"Rejected webhook from {request.remote}: bad authorization header")
+            return web.json_response({'success': False}, status=401)
+        
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.json_response({'success': False, 'message': 'Invalid JSON'}, status=400)
+        
+        # The handler touches the DB and signal-cli, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.handler, payload)
+        except Exception as e:
+            logger.error(f"Webhook handler error: {e}")
+            return web.json_response({'success': False}, status=500)
+        
+        return web.json_response({'success': True})
+    
+    async def _start_site(self):
+        app = web.Application()
+        app.router.add_post('/webhook/overseerr', self.handle_overseerr)
+        
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+    
+    def _run(self, started: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_site())
+            logger.info(f"Webhook server listening on {self.host}:{self.port}")
+        except Exception as e:
+            logger.error(f"Failed to start webhook server: {e}")
+            self.runner = None
+            return
+        finally:
+            started.set()
+        
+        self.loop.run_forever()
+    
+    def start(self) -> bool:
+        """Start serving in a background thread"""
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self.thread.start()
+        started.wait(timeout=10)
+        return self.runner is not None
+    
+    def stop(self):
+        """Stop the server and its event loop"""
+        if not self.loop:
+            return
+        
+        if self.runner:
+            future = asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop)
+            try:
+                future.result(timeout=5)
+            except Exception as e:
+                logger.error(f"Error stopping webhook server: {e}")
+        
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=5)
+        
+        self.loop = None
+        self.runner = None
+        logger.info("Webhook server stopped")
@@ -2,6 +2,8 @@
 import os
 from dotenv import load_dotenv
 
+from bot.utils import format_phone_number
+
 load_dotenv()
 
 class Config:
@@ -18,6 +20,11 @@ class Config:
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///signalerr.db')
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
     
     # Flask Configuration
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -25,11 +32,11 @@ class Config:
     PORT = int(os.getenv('FLASK_PORT', 8080))
     DEBUG = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
     
-    # Admin Configuration
-    ADMIN_PHONE_NUMBERS = [
-        num.strip() for num in os.getenv('ADMIN_PHONE_NUMBERS', '').split(',') 
+    # Admin Configuration (a set: it is checked on every login; numbers are in canonical form)
+    ADMIN_PHONE_NUMBERS = frozenset(
+        format_phone_number(num.strip()) for num in os.getenv('ADMIN_PHONE_NUMBERS', '').split(',') 
         if num.strip()
-    ]
+    )
     
     # Bot Configuration
     REQUEST_TIMEOUT_MINUTES = int(os.getenv('REQUEST_TIMEOUT_MINUTES', 2))
@@ -37,22 +44,42 @@ class Config:
     DEFAULT_VERBOSITY = os.getenv('DEFAULT_VERBOSITY', 'simple')
     ENABLE_GROUP_CHATS = os.getenv('ENABLE_GROUP_CHATS', 'true').lower() == 'true'
     ENABLE_AUTO_NOTIFICATIONS = os.getenv('ENABLE_AUTO_NOTIFICATIONS', 'true').lower() == 'true'
+    POLL_WORKERS = int(os.getenv('POLL_WORKERS', 8))
+    MESSAGE_WORKERS = int(os.getenv('MESSAGE_WORKERS', 8))
+    OVERSEERR_RATE_LIMIT = float(os.getenv('OVERSEERR_RATE_LIMIT', 10))
+    OVERSEERR_BURST = int(os.getenv('OVERSEERR_BURST', 20))
+    OVERSEERR_POOL_SIZE = int(os.getenv('OVERSEERR_POOL_SIZE', 20))
+    OVERSEERR_TIMEOUT = float(os.getenv('OVERSEERR_TIMEOUT', 10))
+    
+    # Webhook Configuration
+    ENABLE_WEBHOOK = os.getenv('ENABLE_WEBHOOK', 'false').lower() == 'true'
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8081))
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', '/app/logs/signalerr.log')
     
+    _validated = False
+    
     @classmethod
     def validate(cls):
         """Validate required configuration"""
-        required_fields = [
-            ('OVERSEERR_URL', cls.OVERSEERR_URL),
-            ('OVERSEERR_API_KEY', cls.OVERSEERR_API_KEY),
-            ('SIGNAL_PHONE_NUMBER', cls.SIGNAL_PHONE_NUMBER),
-        ]
+        # Config is read once from the environment, so a passing check stays valid
+        if cls._validated:
+            return True
         
-        missing = [field for field, value in required_fields if not value]
+        missing = [
+            field for field in ('OVERSEERR_URL', 'OVERSEERR_API_KEY', 'SIGNAL_PHONE_NUMBER')
+            if not getattr(cls, field)
+        ]
         if missing:
             raise ValueError(f"Missing required configuration: {', '.join(missing)}")
         
+        # An unauthenticated webhook would let anyone who can reach the port push status changes
+        if cls.ENABLE_WEBHOOK and not cls.WEBHOOK_SECRET:
+            raise ValueError("WEBHOOK_SECRET is required when ENABLE_WEBHOOK is true")
+        
+        cls._validated = True
         return True
@@ -1,23 +1,49 @@
 
 from db.models import db, User, MediaRequest, Settings, LogEntry, VerbosityLevel, RequestStatus, MediaType
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, insert, select, update
+from sqlalchemy.orm import selectinload, raiseload, load_only, defer
+from flask import current_app
+from bot.utils import format_phone_number
+from cachetools import LRUCache, TTLCache
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Settings are read on every scheduler tick and message but rarely change.
+# Entries expire so writes made by another process show up within a minute.
+_settings_cache = TTLCache(maxsize=256, ttl=60)
+_settings_lock = threading.Lock()
+_MISSING = object()
+
+# (raw admin_phone_numbers value, parsed tuple) so the split happens once per change
+_admin_phones = ('', ())
+
+# Canonical phone number -> user ID. Every inbound message looks its sender up by
+# phone; with the ID known the lookup is a primary-key get, usually an identity-map hit.
+_user_ids = LRUCache(maxsize=1024)
+_user_ids_lock = threading.Lock()
+
+# Columns the dashboard's log list shows; extra_data can be large and is left unloaded
+_LOG_SUMMARY_COLUMNS = load_only(
+    LogEntry.id, LogEntry.level, LogEntry.message, LogEntry.module, LogEntry.created_at
+)
+
 class UserCRUD:
     @staticmethod
     def create_user(phone_number, display_name=None, is_admin=False):
         """Create a new user"""
         try:
             user = User(
-                phone_number=phone_number,
+                phone_number=format_phone_number(phone_number),
                 display_name=display_name,
                 is_admin=is_admin
             )
             db.session.add(user)
             db.session.commit()
+            with _user_ids_lock:
+                _user_ids[user.phone_number] = user.id
             logger.info(f"Created user: {phone_number}")
             return user
         except Exception as e:
@@ -28,12 +54,39 @@ class UserCRUD:
     @staticmethod
     def get_user_by_phone(phone_number):
         """Get user by phone number"""
-        return User.query.filter_by(phone_number=phone_number).first()
+        phone_number = format_phone_number(phone_number)
+        with _user_ids_lock:
+            user_id = _user_ids.get(phone_number)
+        
+        if user_id is not None:
+            user = db.session.get(User, user_id)
+            # Another process may have changed or removed the row since it was cached
+            if user and user.phone_number == phone_number:
+                return user
+        
+        # Stored numbers are canonical, so this matches the unique index exactly
+        user = db.session.execute(
+            select(User).where(User.phone_number == phone_number)
+        ).scalar_one_or_none()
+        with _user_ids_lock:
+            if user:
+                _user_ids[phone_number] = user.id
+            else:
+                _user_ids.pop(phone_number, None)
+        return user
     
     @staticmethod
     def get_user_by_id(user_id):
         """Get user by ID"""
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
+    
+    @staticmethod
+    def count_users(active_only=True):
+        """Count users without loading them"""
+        query = db.session.query(func.count(User.id))
+        if active_only:
+            query = query.filter(User.is_active == True)
+        return query.scalar()
     
     @staticmethod
     def get_all_users(active_only=True):
@@ -47,9 +100,10 @@ class UserCRUD:
     def update_user(user_id, **kwargs):
         """Update user"""
         try:
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 return None
+            old_phone = user.phone_number
             
             for key, value in kwargs.items():
                 if hasattr(user, key):
@@ -57,6 +111,10 @@ class UserCRUD:
             
             user.last_active = datetime.utcnow()
             db.session.commit()
+            if user.phone_number != old_phone:
+                with _user_ids_lock:
+                    _user_ids.pop(old_phone, None)
+                    _user_ids[user.phone_number] = user.id
             logger.info(f"Updated user {user.phone_number}")
             return user
         except Exception as e:
@@ -64,11 +122,29 @@ class UserCRUD:
             logger.error(f"Error updating user {user_id}: {e}")
             raise
     
+    @staticmethod
+    def bulk_update_last_active(last_active):
+        """Set last_active for many users ({user_id: datetime}) in one transaction"""
+        if not last_active:
+            return 0
+        
+        try:
+            db.session.execute(
+                update(User),
+                [{'id': user_id, 'last_active': timestamp} for user_id, timestamp in last_active.items()]
+            )
+            db.session.commit()
+            return len(last_active)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error updating last active times: {e}")
+            raise
+    
     @staticmethod
     def delete_user(user_id):
         """Delete user (soft delete by setting inactive)"""
         try:
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 return False
             
@@ -81,6 +157,13 @@ class UserCRUD:
             logger.error(f"Error deactivating user {user_id}: {e}")
             raise
 
+def _request_load_options():
+    """Loader options for MediaRequest list queries"""
+    # Users come in one batch; under DEBUG any other lazy load raises so N+1 regressions show up
+    if current_app.debug:
+        return (selectinload(MediaRequest.user), raiseload('*'))
+    return (selectinload(MediaRequest.user),)
+
 class MediaRequestCRUD:
     @staticmethod
     def create_request(user_id, media_type, media_id, title, year=None, is_4k=False, seasons=None):
@@ -88,7 +171,7 @@ class MediaRequestCRUD:
         try:
             request = MediaRequest(
                 user_id=user_id,
-                media_type=MediaType(media_type),
+                media_type=MediaType(media_type).value,
                 media_id=media_id,
                 title=title,
                 year=year,
@@ -110,15 +193,22 @@ class MediaRequestCRUD:
     @staticmethod
     def get_request_by_id(request_id):
         """Get request by ID"""
-        return MediaRequest.query.get(request_id)
+        return db.session.get(MediaRequest, request_id)
+    
+    @staticmethod
+    def get_request_by_overseerr_id(overseerr_request_id):
+        """Get request by its Overseerr request ID"""
+        return db.session.execute(
+            select(MediaRequest).where(MediaRequest.overseerr_request_id == overseerr_request_id).limit(1)
+        ).scalar_one_or_none()
     
     @staticmethod
     def get_user_requests(user_id, status=None, limit=None):
         """Get requests for a user"""
-        query = MediaRequest.query.filter_by(user_id=user_id)
+        query = MediaRequest.query.options(*_request_load_options()).filter_by(user_id=user_id)
         
         if status:
-            query = query.filter_by(status=RequestStatus(status))
+            query = query.filter_by(status=RequestStatus(status).value)
         
         query = query.order_by(MediaRequest.created_at.desc())
         
@@ -130,19 +220,24 @@ class MediaRequestCRUD:
     @staticmethod
     def get_pending_requests():
         """Get all pending requests"""
-        return MediaRequest.query.filter(
-            MediaRequest.status.in_([RequestStatus.PENDING, RequestStatus.APPROVED, RequestStatus.DOWNLOADING])
+        # Status polling never reads the free-text columns, so leave them unloaded
+        return MediaRequest.query.options(
+            *_request_load_options(),
+            defer(MediaRequest.seasons_requested),
+            defer(MediaRequest.error_message)
+        ).filter(
+            MediaRequest.status.in_([RequestStatus.PENDING.value, RequestStatus.APPROVED.value, RequestStatus.DOWNLOADING.value])
         ).all()
     
     @staticmethod
     def update_request_status(request_id, status, overseerr_request_id=None, error_message=None):
         """Update request status"""
         try:
-            request = MediaRequest.query.get(request_id)
+            request = db.session.get(MediaRequest, request_id)
             if not request:
                 return None
             
-            request.status = RequestStatus(status)
+            request.status = RequestStatus(status).value
             request.updated_at = datetime.utcnow()
             
             if overseerr_request_id:
@@ -163,28 +258,151 @@ class MediaRequestCRUD:
             raise
     
     @staticmethod
-    def get_requests_by_status(status):
-        """Get requests by status"""
-        return MediaRequest.query.filter_by(status=RequestStatus(status)).all()
+    def bulk_update_status(updates):
+        """Apply many (request_id, status) changes in a single transaction"""
+        if not updates:
+            return 0
+        
+        try:
+            ids_by_status = {}
+            for request_id, status in updates:
+                ids_by_status.setdefault(status, []).append(request_id)
+            
+            now = datetime.utcnow()
+            for status, ids in ids_by_status.items():
+                values = {'status': RequestStatus(status).value, 'updated_at': now}
+                if status == 'completed':
+                    values['completed_at'] = now
+                
+                db.session.execute(
+                    update(MediaRequest).where(MediaRequest.id.in_(ids)).values(**values)
+                )
+            
+            db.session.commit()
+            logger.info(f"Updated status of {len(updates)} requests")
+            return len(updates)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error bulk updating request statuses: {e}")
+            raise
+    
+    @staticmethod
+    def get_requests_by_status(status, limit=None, offset=0):
+        """Get requests by status, newest first"""
+        query = MediaRequest.query.options(*_request_load_options()).filter_by(
+            status=RequestStatus(status).value
+        ).order_by(MediaRequest.created_at.desc())
+        
+        if limit:
+            query = query.limit(limit).offset(offset)
+        
+        return query.all()
+    
+    @staticmethod
+    def count_requests_by_status(status):
+        """Count requests with a given status"""
+        return db.session.query(func.count(MediaRequest.id)).filter(
+            MediaRequest.status == RequestStatus(status).value
+        ).scalar()
+    
+    @staticmethod
+    def count_recent_requests(days=7):
+        """Count requests created in the last N days"""
+        since = datetime.utcnow() - timedelta(days=days)
+        return db.session.query(func.count(MediaRequest.id)).filter(
+            MediaRequest.created_at >= since
+        ).scalar()
     
     @staticmethod
-    def get_recent_requests(days=7, limit=50):
+    def get_recent_requests(days=7, limit=50, offset=0):
         """Get recent requests"""
         since = datetime.utcnow() - timedelta(days=days)
-        return MediaRequest.query.filter(
+        return MediaRequest.query.options(*_request_load_options()).filter(
             MediaRequest.created_at >= since
-        ).order_by(MediaRequest.created_at.desc()).limit(limit).all()
+        ).order_by(MediaRequest.created_at.desc()).limit(limit).offset(offset).all()
+    
+    @staticmethod
+    def get_summary_counts(days=7):
+        """Get the dashboard counts (active users, recent, pending and completed requests) in one query"""
+        since = datetime.utcnow() - timedelta(days=days)
+        
+        def count(model, *criteria):
+            return select(func.count(model.id)).where(*criteria).scalar_subquery()
+        
+        row = db.session.execute(select(
+            count(User, User.is_active == True).label('total_users'),
+            count(MediaRequest, MediaRequest.created_at >= since).label('recent_requests'),
+            count(MediaRequest, MediaRequest.status == RequestStatus.PENDING.value).label('pending_requests'),
+            count(MediaRequest, MediaRequest.status == RequestStatus.COMPLETED.value).label('completed_requests')
+        )).one()
+        return row._asdict()
+    
+    @staticmethod
+    def get_daily_counts_for_all_users():
+        """Get today's request count per user ID in one grouped query"""
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        rows = db.session.query(
+            MediaRequest.user_id, func.count(MediaRequest.id)
+        ).filter(
+            MediaRequest.created_at >= today,
+            MediaRequest.created_at < today + timedelta(days=1)
+        ).group_by(MediaRequest.user_id).all()
+        return dict(rows)
 
 class SettingsCRUD:
     @staticmethod
     def get_setting(key, default=None):
         """Get setting value"""
-        return Settings.get_setting(key, default)
+        with _settings_lock:
+            value = _settings_cache.get(key, _MISSING)
+        
+        if value is _MISSING:
+            # One query refills every key, so the settings read alongside this one are hits.
+            # Absent keys are cached too so they don't hit the DB every time.
+            value = SettingsCRUD.preload().get(key, _MISSING)
+            if value is _MISSING:
+                with _settings_lock:
+                    _settings_cache[key] = value
+        
+        return default if value is _MISSING else value
+    
+    @staticmethod
+    def preload():
+        """Load every setting into the cache with a single query"""
+        values = dict(db.session.execute(select(Settings.key, Settings.value)).all())
+        with _settings_lock:
+            _settings_cache.update(values)
+        return values
     
     @staticmethod
     def set_setting(key, value, description=None):
         """Set setting value"""
-        return Settings.set_setting(key, value, description)
+        try:
+            return Settings.set_setting(key, value, description)
+        finally:
+            SettingsCRUD.invalidate(key)
+    
+    @staticmethod
+    def invalidate(key=None):
+        """Drop a cached setting, or all of them if no key is given"""
+        with _settings_lock:
+            if key is None:
+                _settings_cache.clear()
+            else:
+                _settings_cache.pop(key, None)
+    
+    @staticmethod
+    def get_admin_phones():
+        """Get the admin_phone_numbers setting as a tuple of numbers"""
+        global _admin_phones
+        raw = SettingsCRUD.get_setting('admin_phone_numbers', '')
+        
+        cached_raw, phones = _admin_phones
+        if raw != cached_raw:
+            phones = tuple(phone.strip() for phone in raw.split(',') if phone.strip())
+            _admin_phones = (raw, phones)
+        
+        return phones
     
     @staticmethod
     def get_all_settings():
@@ -194,14 +412,39 @@ class SettingsCRUD:
     @staticmethod
     def update_multiple_settings(settings_dict):
         """Update multiple settings at once"""
+        if not settings_dict:
+            return True
+        
         try:
+            # One lookup of the existing rows, then one UPDATE batch and one INSERT batch
+            existing = dict(db.session.query(Settings.key, Settings.id).filter(
+                Settings.key.in_(list(settings_dict))
+            ).all())
+            
+            now = datetime.utcnow()
+            updates = []
+            inserts = []
             for key, value in settings_dict.items():
-                Settings.set_setting(key, str(value))
+                if key in existing:
+                    updates.append({'id': existing[key], 'value': str(value), 'updated_at': now})
+                else:
+                    inserts.append({'key': key, 'value': str(value), 'updated_at': now})
+            
+            if updates:
+                db.session.execute(update(Settings), updates)
+            if inserts:
+                db.session.execute(insert(Settings), inserts)
+            
+            db.session.commit()
             logger.info(f"Updated {len(settings_dict)} settings")
             return True
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error updating settings: {e}")
             raise
+        finally:
+            for key in settings_dict:
+                SettingsCRUD.invalidate(key)
 
 class LogCRUD:
     @staticmethod
@@ -228,8 +471,23 @@ class LogCRUD:
             raise
     
     @staticmethod
-    def get_logs(level=None, module=None, user_id=None, limit=100, offset=0):
-        """Get log entries with filters"""
+    def bulk_create_logs(rows):
+        """Insert many log entries (dicts of LogEntry columns) in one transaction"""
+        if not rows:
+            return 0
+        
+        try:
+            db.session.execute(insert(LogEntry), rows)
+            db.session.commit()
+            return len(rows)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error creating log entries: {e}")
+            raise
+    
+    @staticmethod
+    def get_logs(level=None, module=None, user_id=None, limit=100, offset=0, before=None, after=None):
+        """Get log entries with filters, newest first"""
         query = LogEntry.query
         
         if level:
@@ -241,26 +499,56 @@ class LogCRUD:
         if user_id:
             query = query.filter_by(user_id=user_id)
         
-        return query.order_by(LogEntry.created_at.desc()).offset(offset).limit(limit).all()
+        # before/after are (created_at, id) of a row on the neighbouring page, so the
+        # database seeks straight to the page instead of skipping offset rows
+        if after:
+            created_at, entry_id = after
+            query = query.filter(or_(
+                LogEntry.created_at > created_at,
+                and_(LogEntry.created_at == created_at, LogEntry.id > entry_id)
+            ))
+            rows = query.order_by(LogEntry.created_at.asc(), LogEntry.id.asc()).limit(limit).all()
+            return rows[::-1]
+        
+        if before:
+            created_at, entry_id = before
+            query = query.filter(or_(
+                LogEntry.created_at < created_at,
+                and_(LogEntry.created_at == created_at, LogEntry.id < entry_id)
+            ))
+        
+        return query.order_by(LogEntry.created_at.desc(), LogEntry.id.desc()).offset(offset).limit(limit).all()
     
     @staticmethod
     def get_recent_logs(hours=24, limit=100):
         """Get recent log entries"""
         since = datetime.utcnow() - timedelta(hours=hours)
-        return LogEntry.query.filter(
+        return LogEntry.query.options(_LOG_SUMMARY_COLUMNS).filter(
             LogEntry.created_at >= since
         ).order_by(LogEntry.created_at.desc()).limit(limit).all()
     
     @staticmethod
-    def cleanup_old_logs(days=30):
+    def cleanup_old_logs(days=30, batch_size=5000):
         """Clean up old log entries"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = 0
         try:
-            cutoff = datetime.utcnow() - timedelta(days=days)
-            deleted = LogEntry.query.filter(LogEntry.created_at < cutoff).delete()
-            db.session.commit()
+            # Delete in short transactions so a large backlog doesn't hold the write lock for long
+            while True:
+                ids = [row.id for row in db.session.query(LogEntry.id).filter(
+                    LogEntry.created_at < cutoff
+                ).limit(batch_size)]
+                if not ids:
+                    break
+                
+                deleted += db.session.query(LogEntry).filter(
+                    LogEntry.id.in_(ids)
+                ).delete(synchronize_session=False)
+                db.session.commit()
+            
             logger.info(f"Cleaned up {deleted} old log entries")
             return deleted
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error cleaning up logs: {e}")
+            logger.error(f"Error cleaning up logs after deleting {deleted}: {e}")
             raise
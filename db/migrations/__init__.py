@@ -0,0 +1,2 @@
+
+# One-off schema migrations, run by hand when upgrading an existing database
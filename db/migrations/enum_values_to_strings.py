@@ -0,0 +1,46 @@
+
+"""Convert enum columns from stored enum names to plain value strings.
+
+Databases created before the enum columns became strings hold names such as
+'PENDING' (and on PostgreSQL/MySQL, native ENUM types). Run once after upgrading:
+
+    python -m db.migrations.enum_values_to_strings
+"""
+import logging
+from sqlalchemy import create_engine, text
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# (table, column, length, native enum type name used by the old db.Enum columns)
+COLUMNS = (
+    ('users', 'verbosity_level', 20, 'verbositylevel'),
+    ('media_requests', 'status', 20, 'requeststatus'),
+    ('media_requests', 'media_type', 10, 'mediatype'),
+)
+
+def upgrade(engine):
+    """Rewrite enum names as lowercase values, converting native enum columns to VARCHAR"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        for table, column, length, type_name in COLUMNS:
+            if dialect == 'postgresql':
+                # lower() doesn't accept a native enum, so cast through text while changing the type
+                conn.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE VARCHAR({length}) USING lower({column}::text)"
+                ))
+                conn.execute(text(f"DROP TYPE IF EXISTS {type_name}"))
+                continue
+            
+            if dialect in ('mysql', 'mariadb'):
+                conn.execute(text(f"ALTER TABLE {table} MODIFY {column} VARCHAR({length})"))
+            
+            result = conn.execute(text(
+                f"UPDATE {table} SET {column} = lower({column}) WHERE {column} != lower({column})"
+            ))
+            logger.info(f"Converted {result.rowcount} {table}.{column} values")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    upgrade(create_engine(Config.DATABASE_URL))
@@ -2,16 +2,18 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 from enum import Enum
-import json
+import orjson
 
 db = SQLAlchemy()
 
-class VerbosityLevel(Enum):
+# Enum columns are stored as plain value strings ('pending', 'tv', ...): rows load
+# without per-row enum conversion, and these str enums still compare equal to them
+class VerbosityLevel(str, Enum):
     VERBOSE = "verbose"
     SIMPLE = "simple"
     CASUAL = "casual"
 
-class RequestStatus(Enum):
+class RequestStatus(str, Enum):
     PENDING = "pending"
     APPROVED = "approved"
     DOWNLOADING = "downloading"
@@ -19,65 +21,86 @@ class RequestStatus(Enum):
     FAILED = "failed"
     DECLINED = "declined"
 
-class MediaType(Enum):
+class MediaType(str, Enum):
     MOVIE = "movie"
     TV = "tv"
 
+def _one_of(column, enum_cls):
+    """CHECK constraint limiting a string column to an enum's values"""
+    values = ', '.join(f"'{member.value}'" for member in enum_cls)
+    return db.CheckConstraint(f"{column} IN ({values})")
+
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        _one_of('verbosity_level', VerbosityLevel),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     phone_number = db.Column(db.String(20), unique=True, nullable=False)
     display_name = db.Column(db.String(100))
     is_admin = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
-    verbosity_level = db.Column(db.Enum(VerbosityLevel), default=VerbosityLevel.SIMPLE)
+    verbosity_level = db.Column(db.String(20), default=VerbosityLevel.SIMPLE.value)
     auto_notifications = db.Column(db.Boolean, default=True)
     daily_request_limit = db.Column(db.Integer, default=10)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_active = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    requests = db.relationship('MediaRequest', backref='user', lazy=True)
+    requests = db.relationship('MediaRequest', back_populates='user', lazy=True)
     
     def get_daily_request_count(self):
         """Get number of requests made today"""
-        today = datetime.utcnow().date()
+        # A plain range on created_at can use the (user_id, created_at) index; date() can't
+        start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
         return MediaRequest.query.filter(
             MediaRequest.user_id == self.id,
-            db.func.date(MediaRequest.created_at) == today
+            MediaRequest.created_at >= start,
+            MediaRequest.created_at < start + timedelta(days=1)
         ).count()
     
     def can_make_request(self):
         """Check if user can make another request today"""
         return self.get_daily_request_count() < self.daily_request_limit
     
-    def to_dict(self):
+    def to_dict(self, daily_requests=None):
+        """Serialize; pass daily_requests when serializing many users to skip a count per user"""
+        if daily_requests is None:
+            daily_requests = self.get_daily_request_count()
+        
         return {
             'id': self.id,
             'phone_number': self.phone_number,
             'display_name': self.display_name,
             'is_admin': self.is_admin,
             'is_active': self.is_active,
-            'verbosity_level': self.verbosity_level.value,
+            'verbosity_level': self.verbosity_level,
             'auto_notifications': self.auto_notifications,
             'daily_request_limit': self.daily_request_limit,
             'created_at': self.created_at.isoformat(),
             'last_active': self.last_active.isoformat(),
-            'daily_requests': self.get_daily_request_count()
+            'daily_requests': daily_requests
         }
 
 class MediaRequest(db.Model):
     __tablename__ = 'media_requests'
+    __table_args__ = (
+        # Per-user history and daily counts, and status lists, are all ordered or bounded by created_at
+        db.Index('idx_media_requests_user_created', 'user_id', 'created_at'),
+        db.Index('idx_media_requests_status_created', 'status', 'created_at'),
+        _one_of('media_type', MediaType),
+        _one_of('status', RequestStatus),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     overseerr_request_id = db.Column(db.Integer)
-    media_type = db.Column(db.Enum(MediaType), nullable=False)
+    media_type = db.Column(db.String(10), nullable=False)
     media_id = db.Column(db.Integer, nullable=False)  # TMDB ID
     title = db.Column(db.String(255), nullable=False)
     year = db.Column(db.Integer)
-    status = db.Column(db.Enum(RequestStatus), default=RequestStatus.PENDING)
+    status = db.Column(db.String(20), default=RequestStatus.PENDING.value)
     is_4k = db.Column(db.Boolean, default=False)
     seasons_requested = db.Column(db.Text)  # JSON array for TV shows
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -85,26 +108,29 @@ class MediaRequest(db.Model):
     completed_at = db.Column(db.DateTime)
     error_message = db.Column(db.Text)
     
+    # Lists of requests always show who asked, so load their users in one batched query
+    user = db.relationship('User', back_populates='requests', lazy='selectin')
+    
     def get_seasons_requested(self):
         """Get seasons requested as list"""
         if self.seasons_requested:
-            return json.loads(self.seasons_requested)
+            return orjson.loads(self.seasons_requested)
         return []
     
     def set_seasons_requested(self, seasons):
         """Set seasons requested from list"""
-        self.seasons_requested = json.dumps(seasons) if seasons else None
+        self.seasons_requested = orjson.dumps(seasons).decode() if seasons else None
     
     def to_dict(self):
         return {
             'id': self.id,
             'user_id': self.user_id,
             'overseerr_request_id': self.overseerr_request_id,
-            'media_type': self.media_type.value,
+            'media_type': self.media_type,
             'media_id': self.media_id,
             'title': self.title,
             'year': self.year,
-            'status': self.status.value,
+            'status': self.status,
             'is_4k': self.is_4k,
             'seasons_requested': self.get_seasons_requested(),
             'created_at': self.created_at.isoformat(),
@@ -153,6 +179,9 @@ class Settings(db.Model):
 
 class LogEntry(db.Model):
     __tablename__ = 'log_entries'
+    __table_args__ = (
+        db.Index('idx_log_entries_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     level = db.Column(db.String(20), nullable=False)
@@ -166,12 +195,12 @@ class LogEntry(db.Model):
     def get_metadata(self):
         """Get metadata as dict"""
         if self.extra_data:
-            return json.loads(self.extra_data)
+            return orjson.loads(self.extra_data)
         return {}
     
     def set_metadata(self, data):
         """Set metadata from dict"""
-        self.extra_data = json.dumps(data) if data else None
+        self.extra_data = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode() if data else None
     
     def to_dict(self):
         return {
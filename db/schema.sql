@@ -64,6 +64,8 @@ CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active);
 CREATE INDEX IF NOT EXISTS idx_media_requests_user_id ON media_requests(user_id);
 CREATE INDEX IF NOT EXISTS idx_media_requests_status ON media_requests(status);
 CREATE INDEX IF NOT EXISTS idx_media_requests_created_at ON media_requests(created_at);
+CREATE INDEX IF NOT EXISTS idx_media_requests_user_created ON media_requests(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_media_requests_status_created ON media_requests(status, created_at);
 CREATE INDEX IF NOT EXISTS idx_settings_key ON settings(key);
 CREATE INDEX IF NOT EXISTS idx_log_entries_level ON log_entries(level);
 CREATE INDEX IF NOT EXISTS idx_log_entries_created_at ON log_entries(created_at);
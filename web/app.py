@@ -1,19 +1,50 @@
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import logging
+import orjson
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from sqlalchemy.pool import QueuePool
+from cachetools import TTLCache
 
 from config import Config
 from db.models import db, User, MediaRequest, Settings, LogEntry, VerbosityLevel, RequestStatus, MediaType
 from db.crud import UserCRUD, MediaRequestCRUD, SettingsCRUD, LogCRUD
 from api.overseerr import OverseerrAPI
+from bot.utils import format_phone_number
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson"""
+    # Dates go through Flask's default hook so they keep the HTTP date format
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config.from_object(Config)
 
+# Keep warm connections for the dashboard's bursts of queries. In-memory SQLite
+# gets a single static connection from Flask-SQLAlchemy and takes no pool sizing.
+if Config.DATABASE_URL not in ('sqlite://', 'sqlite:///:memory:'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': QueuePool,
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_pre_ping': Config.DB_POOL_PRE_PING
+    }
+
 # Initialize extensions
 db.init_app(app)
 CORS(app)
@@ -25,13 +56,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Outbound HTTP calls that can overlap with a view's database queries
+_io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='web-io')
+
+# Overseerr reachability per (url, api_key). Results stay fresh for 30 seconds, the
+# dashboard's refresh interval; after that the last known result is served while
+# a single background probe refreshes it.
+_connection_fresh = TTLCache(maxsize=16, ttl=30)
+_connection_last = {}
+_connection_probes = {}
+_connection_lock = threading.Lock()
+
+def _probe_overseerr(key):
+    """Test an Overseerr connection and record the result"""
+    connected = False
+    try:
+        connected = OverseerrAPI(*key).test_connection()
+        return connected
+    finally:
+        with _connection_lock:
+            _connection_fresh[key] = connected
+            _connection_last[key] = connected
+            _connection_probes.pop(key, None)
+
+def overseerr_connection_status(url, api_key):
+    """Get a Future for Overseerr reachability, probing only when the cached result is stale"""
+    key = (url, api_key)
+    status = Future()
+    with _connection_lock:
+        if key in _connection_fresh:
+            status.set_result(_connection_fresh[key])
+            return status
+        
+        probe = _connection_probes.get(key)
+        if probe is None:
+            probe = _connection_probes[key] = _io_pool.submit(_probe_overseerr, key)
+        
+        if key in _connection_last:
+            status.set_result(_connection_last[key])
+            return status
+    
+    # Nothing known yet for these settings, so the caller waits for the first probe
+    return probe
+
 # Initialize database
 with app.app_context():
     db.create_all()
     
+    # create_all skips tables that already exist, so add indexes introduced since
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    
     # Create default admin user if none exists
     if not UserCRUD.get_all_users():
-        for admin_phone in Config.ADMIN_PHONE_NUMBERS:
+        for admin_phone in sorted(Config.ADMIN_PHONE_NUMBERS):
             if admin_phone:
                 UserCRUD.create_user(admin_phone, "Admin User", is_admin=True)
                 logger.info(f"Created default admin user: {admin_phone}")
@@ -49,7 +128,7 @@ def admin_required(f):
 def login():
     """Admin login page"""
     if request.method == 'POST':
-        phone = request.form.get('phone', '').strip()
+        phone = format_phone_number(request.form.get('phone', '').strip())
         
         if phone in Config.ADMIN_PHONE_NUMBERS:
             session['admin_authenticated'] = True
@@ -73,29 +152,19 @@ def logout():
 def dashboard():
     """Main dashboard"""
     try:
-        # Get statistics
-        total_users = len(UserCRUD.get_all_users())
-        recent_requests = MediaRequestCRUD.get_recent_requests(days=7)
-        pending_requests = MediaRequestCRUD.get_requests_by_status('pending')
-        completed_requests = MediaRequestCRUD.get_requests_by_status('completed')
-        
-        # Test Overseerr connection
-        overseerr_api = OverseerrAPI(
+        # Overseerr status comes from the cache; a cold probe runs while the queries below do
+        connection_check = overseerr_connection_status(
             SettingsCRUD.get_setting('overseerr_url', Config.OVERSEERR_URL),
             SettingsCRUD.get_setting('overseerr_api_key', Config.OVERSEERR_API_KEY)
         )
-        overseerr_connected = overseerr_api.test_connection()
+        
+        # Get statistics (all counted in one round trip, nothing is loaded)
+        stats = MediaRequestCRUD.get_summary_counts(days=7)
         
         # Get recent logs
         recent_logs = LogCRUD.get_recent_logs(hours=24, limit=10)
         
-        stats = {
-            'total_users': total_users,
-            'recent_requests': len(recent_requests),
-            'pending_requests': len(pending_requests),
-            'completed_requests': len(completed_requests),
-            'overseerr_connected': overseerr_connected
-        }
+        stats['overseerr_connected'] = connection_check.result()
         
         return render_template('dashboard.html', stats=stats, recent_logs=recent_logs)
         
@@ -110,11 +179,15 @@ def users():
     """User management page"""
     try:
         all_users = UserCRUD.get_all_users(active_only=False)
-        return render_template('users.html', users=all_users)
+        
+        # One grouped query instead of a count per row
+        daily_counts = MediaRequestCRUD.get_daily_counts_for_all_users()
+        
+        return render_template('users.html', users=all_users, daily_counts=daily_counts)
     except Exception as e:
         logger.error(f"Users page error: {e}")
         flash(f'Error loading users: {e}', 'error')
-        return render_template('users.html', users=[])
+        return render_template('users.html', users=[], daily_counts={})
 
 @app.route('/users/add', methods=['POST'])
 @admin_required
@@ -166,7 +239,7 @@ def edit_user(user_id):
             is_admin=is_admin,
             is_active=is_active,
             daily_request_limit=daily_limit,
-            verbosity_level=VerbosityLevel(verbosity),
+            verbosity_level=VerbosityLevel(verbosity).value,
             auto_notifications=auto_notifications
         )
         
@@ -205,31 +278,25 @@ def requests():
         page = int(request.args.get('page', 1))
         per_page = 20
         
-        # Get requests with pagination
+        # Fetch just this page, plus one row to learn whether a next page exists
+        offset = (page - 1) * per_page
         if status_filter:
-            all_requests = MediaRequestCRUD.get_requests_by_status(status_filter)
+            requests_page = MediaRequestCRUD.get_requests_by_status(status_filter, limit=per_page + 1, offset=offset)
         else:
-            all_requests = MediaRequestCRUD.get_recent_requests(days=30, limit=100)
+            requests_page = MediaRequestCRUD.get_recent_requests(days=30, limit=per_page + 1, offset=offset)
         
-        # Simple pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        requests_page = all_requests[start:end]
-        
-        # Get users for display
-        user_map = {user.id: user for user in UserCRUD.get_all_users(active_only=False)}
+        has_next = len(requests_page) > per_page
         
         return render_template('requests.html', 
-                             requests=requests_page, 
-                             user_map=user_map,
+                             requests=requests_page[:per_page], 
                              status_filter=status_filter,
                              page=page,
-                             has_next=end < len(all_requests))
+                             has_next=has_next)
         
     except Exception as e:
         logger.error(f"Requests page error: {e}")
         flash(f'Error loading requests: {e}', 'error')
-        return render_template('requests.html', requests=[], user_map={})
+        return render_template('requests.html', requests=[])
 
 @app.route('/requests/<int:request_id>/update_status', methods=['POST'])
 @admin_required
@@ -294,6 +361,14 @@ def update_settings():
     
     return redirect(url_for('settings'))
 
+def _log_cursor(prefix):
+    """Read a (created_at, id) pagination cursor from the query string"""
+    timestamp = request.args.get(f'{prefix}_ts')
+    entry_id = request.args.get(f'{prefix}_id', type=int)
+    if not timestamp or entry_id is None:
+        return None
+    return datetime.fromisoformat(timestamp), entry_id
+
 @app.route('/logs')
 @admin_required
 def logs():
@@ -304,21 +379,36 @@ def logs():
         page = int(request.args.get('page', 1))
         per_page = 50
         
-        offset = (page - 1) * per_page
-        
-        logs = LogCRUD.get_logs(
-            level=level_filter if level_filter else None,
-            module=module_filter if module_filter else None,
-            limit=per_page,
-            offset=offset
-        )
+        # Next/Previous links carry the edge row of the current page as a cursor
+        before = _log_cursor('before')
+        after = _log_cursor('after')
+        
+        if after:
+            # Stepping back from a page we have seen, so there is always a next one
+            logs = LogCRUD.get_logs(
+                level=level_filter if level_filter else None,
+                module=module_filter if module_filter else None,
+                limit=per_page,
+                after=after
+            )
+            has_next = True
+        else:
+            # Ask for one extra row to learn whether a next page exists
+            logs = LogCRUD.get_logs(
+                level=level_filter if level_filter else None,
+                module=module_filter if module_filter else None,
+                limit=per_page + 1,
+                before=before
+            )
+            has_next = len(logs) > per_page
+            logs = logs[:per_page]
         
         return render_template('logs.html', 
                              logs=logs,
                              level_filter=level_filter,
                              module_filter=module_filter,
                              page=page,
-                             has_next=len(logs) == per_page)
+                             has_next=has_next)
         
     except Exception as e:
         logger.error(f"Logs page error: {e}")
@@ -354,14 +444,17 @@ def test_overseerr():
 def api_stats():
     """API endpoint for dashboard stats"""
     try:
-        total_users = len(UserCRUD.get_all_users())
-        recent_requests = MediaRequestCRUD.get_recent_requests(days=1)
-        pending_requests = MediaRequestCRUD.get_requests_by_status('pending')
+        connection_check = overseerr_connection_status(
+            SettingsCRUD.get_setting('overseerr_url', Config.OVERSEERR_URL),
+            SettingsCRUD.get_setting('overseerr_api_key', Config.OVERSEERR_API_KEY)
+        )
+        counts = MediaRequestCRUD.get_summary_counts(days=1)
         
         return jsonify({
-            'total_users': total_users,
-            'requests_today': len(recent_requests),
-            'pending_requests': len(pending_requests)
+            'total_users': counts['total_users'],
+            'requests_today': counts['recent_requests'],
+            'pending_requests': counts['pending_requests'],
+            'overseerr_connected': connection_check.result()
         })
         
     except Exception as e: